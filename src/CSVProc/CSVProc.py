@@ -21,19 +21,70 @@ from collections import OrderedDict
 import datetime
 import copy
 import os.path
-from src import C
+import random
+import sqlite3
+from src import C, WARN
+from src.CSVProc.WarningStore import WarningStore
+from src.CSVProc.TextRepair import build_translation_table, unmapped_characters
+from src.CSVProc.CatalogIndex import CATALOG_EXTENSIONS, CatalogIndex, open_catalog
+from src.CSVProc.CatalogMerge import CatalogMerger, lot_sort_key
+from src.CSVProc.CatalogStore import CatalogStore
+from src.CSVProc.ConsignorReport import ConsignorReport
+from src.CSVProc.ConstraintChecker import ConstraintChecker
+from src.CSVProc.DuplicateDetector import DuplicateDetector
+from src.CSVProc.EstimateOutliers import find_estimate_outliers
+from src.CSVProc.ExportParts import ExportParts
+from src.CSVProc.ExportSnapshot import ExportSnapshot
+from src.CSVProc.ImageManifest import ImageManifest
+from src.CSVProc.LotHistory import LotHistory
+from src.CSVProc.NumberParser import NumberParser
+from src.CSVProc.OutputManifest import OutputManifest, ZipOutputManifest
+from src.CSVProc.SpellChecker import SpellChecker
+from src.CSVProc.TruncationProfiler import TruncationProfiler
+from src.CSVProc.ProcessorConfig import ProcessorConfig
+
+_OPTION_NAMES = frozenset(ProcessorConfig.option_names())
+
+
+# spelled-out quantities recognized in lot titles
+ENG_QTYS = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+            "eleven": 11, "twelve": 12, "dozen": 12}
+_QTY = r"\d+|" + "|".join(ENG_QTYS)
+
+# every quantity expression understood in a lot title, as one alternation (longest forms first so that
+#   ex: "lot of three" is matched once rather than as "three", & "two dozen" as 24 rather than 2 + 12);
+#   a number hyphenated to the next word is part of a compound rather than a quantity (ex: "Two-Tone",
+#   "Three-Piece Tea Service"). The word forms are only tried at the start of a word beginning with a
+#   letter or digit one of them can start with, which keeps the scan of each title cheap.
+TITLE_QTY_RE = re.compile(r"\((?P<paren>\d+)\)"
+                          r"|\b(?=[\dcdefglnpst])(?:"
+                          rf"(?:lot|set|group|collection)\s+of\s+(?P<of>{_QTY})\b(?!-\w)"
+                          rf"|(?P<pieces>{_QTY})[\s-]*(?:pieces|pcs?\.?)(?!\w)"
+                          rf"|(?P<pairs>{_QTY})\s+pairs\b"
+                          rf"|(?P<dozens>{_QTY})\s+dozen\b"
+                          r"|(?P<pair>pair)\b"
+                          rf"|(?P<word>{'|'.join(ENG_QTYS)})\b(?!-\w))",
+                          re.IGNORECASE)
 
 
 class CSVProc:
 
-    def __init__(self):
+    # export columns identifying a lot in each platform's export snapshot (see ExportSnapshot)
+    INV_KEY_FIELDS = ("Lot Number", "Lot Ext")
+    LA_KEY_FIELDS = ("LotNum",)
+
+    # export file prefix: platform name
+    PLATFORM_NAMES = {"Invalu": "Invaluable", "LiveAuc": "LiveAuctioneers"}
+
+    def __init__(self, config: ProcessorConfig = None):
         # keep track of issues with csv fields by lot number
         self.lot_warnings = {}
+        self.warning_records = []   # the same warnings as dicts (lot, code, field, message)
 
         # set of all possible (supported) columns in source catalog .csv file
-        self.af_headers = {"LotNum", "Title", "Desc. 1", "Desc. 2", "Desc. 3", "Desc. 4", "Desc. 5", "LoEst",
-                              "HiEst", "StartBid", "Condition", "Height", "Width", "Depth", "DimUnit", "Weight",
-                              "WtUnit", "Reserve", "Qty", "Consign#", "Ref#", "[Ignore]", "[None]"}
+        self.af_headers = frozenset({"LotNum", "Title", "Desc. 1", "Desc. 2", "Desc. 3", "Desc. 4", "Desc. 5",
+                                     "LoEst", "HiEst", "StartBid", "Condition", "Height", "Width", "Depth", "DimUnit",
+                                     "Weight", "WtUnit", "Reserve", "Qty", "Consign#", "Ref#", "[Ignore]", "[None]"})
 
         # dictionary mapping [af_headers]: [LiveAuctioneers headers]
         self.la_headers = {"LotNum": "LotNum", "Title": "Title", "Desc": "Description", "LoEst": "LowEst",
@@ -54,14 +105,69 @@ class CSVProc:
         self.file_headers = []  # subset of af_headers corresponding to columns in catalog .csv file
         self.export_file_headers = []   # defines export column order
         self.src_path = ""      # the catalog .csv file
+        self.merge_paths = []   # further .csv files (ex: a multi-day sale's other sessions) merged with src_path
         self.dest_path = ""     # a folder to save exported LiveAuctioneers/Invaluable .csv (and log) files in
         self.file_num_cols = 0
 
-        # configuration options (user-configured in SettingsWindow)
-        self.using_bp_condition = False
-        self.bp_condition = ""  # text to substitute for every lot's "Condition" field if using_bp_condition == True
-        self.calc_startbids = False
-        self.calc_empty_startbids = False
+        # configuration options (user-configured in SettingsWindow; see ProcessorConfig for descriptions)
+        self.apply_config(config or ProcessorConfig())
+
+        # per-run state of individual stages
+        self._duplicate_detectors = None
+        self._store = None
+        self._outputs = None        # OutputManifest (or ZipOutputManifest) of dest_path (see _open_output())
+        self._rejected_lots = {}    # lot number -> {"record", "platforms", "reasons"} (see _quarantine_invalid_rows)
+        self._spell_checker = None
+        self._image_manifest = None     # image folder listing (taken once per run)
+        self._lot_history = None        # LotHistory this run's lots are staged in (see _stage_lot_history())
+        self._constraints = None        # ConstraintChecker holding this run's key indexes
+        self._number_parser = None      # NumberParser (with its cache of parsed amounts) for this run
+        self._consignor_report = None   # ConsignorReport gathered during this run's Invaluable export
+
+
+    def __getattr__(self, name: str):
+        # (configuration options are read from the processor's ProcessorConfig, ex: self.using_bp_condition)
+        if name in _OPTION_NAMES:
+            return getattr(self._config, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+
+    def __setattr__(self, name: str, value):
+        if name in _OPTION_NAMES:
+            raise AttributeError(f"CSVProc option '{name}' is read-only; use apply_config() to change options")
+        super().__setattr__(name, value)
+
+
+    def config(self) -> ProcessorConfig:
+        """Returns this processor's (immutable) configuration options.
+        """
+        return self._config
+
+
+    def apply_config(self, config: ProcessorConfig):
+        """Replaces this processor's configuration options with 'config' (ex: a dataclasses.replace() of
+        config()). Sessions already started keep the config they were created with.
+        """
+        self._config = config
+
+
+    def session(self) -> "CSVProc":
+        """Returns a new CSVProc for a single run on this processor's catalog.
+
+        The session shares this processor's (immutable) config, gets a copy of its catalog settings (source,
+        destination & column headers) and starts with empty warnings & data, so runs never see each other's
+        state and several sessions can run at once (ex: from threads). Loaded resources that are only read (the
+        spell checker) are shared.
+        """
+        session = CSVProc(self._config)
+        session.src_path = self.src_path
+        session.merge_paths = list(self.merge_paths)
+        session.dest_path = self.dest_path
+        session.file_headers = list(self.file_headers)
+        session.file_num_cols = self.file_num_cols
+        session._spell_checker = self._spell_checker
+
+        return session
 
 
 
@@ -69,6 +175,8 @@ class CSVProc:
     def test_open(src_path: str):
         """Attempts to open param 'src_path' file for reading.
 
+        The file is indexed as it's opened, so later reads of it (see open_catalog()) don't read it again.
+
         Args:
             src_path: path to a readable file (likely .csv).
 
@@ -76,7 +184,7 @@ class CSVProc:
             bool: True if file can be opened, False if open() raises an OSError.
         """
         try:
-            open(src_path)
+            open_catalog(src_path)
             return True
         except OSError:
             return False
@@ -103,22 +211,48 @@ class CSVProc:
         if not self.src_path:
             raise RuntimeError("CSVProc error: no source file defined.")
 
-        first_n_rows = []
+        index = self._get_catalog_index()
+        first_n_rows = index.rows(0, n)
+        self.file_num_cols = len(index.row(0)) if len(index) else 0
 
-        with open(self.src_path, "r", encoding="latin-1", newline="") as src_file:
-            reader = csv.reader(src_file)
+        return first_n_rows
 
-            line_counter = 0
-            for line in reader:
-                line_counter += 1
-                if line_counter == 1:
-                    self.file_num_cols = len(line)
-                if line_counter <= n:
-                    first_n_rows.append(line)
-                else:
-                    break
 
-        return first_n_rows
+    def get_rows(self, start: int, stop: int) -> list:
+        """Returns rows [start, stop) of the source file (as a list of lists) without reading the rows before them.
+
+        Raises:
+            RuntimeError: If no source file has been defined.
+        """
+        if not self.src_path:
+            raise RuntimeError("CSVProc error: no source file defined.")
+
+        return self._get_catalog_index().rows(start, stop)
+
+
+    def sample_rows(self, n_first: int, n_random: int, *, seed=None) -> list:
+        """Returns the first 'n_first' rows of the source file plus 'n_random' rows picked at random from
+        the rest (as lists of strings, in file order), without reading the rows in between.
+
+        Raises:
+            RuntimeError: If no source file has been defined.
+        """
+        if not self.src_path:
+            raise RuntimeError("CSVProc error: no source file defined.")
+
+        index = self._get_catalog_index()
+        n_first = min(n_first, len(index))
+        # (the index knows the row count, so rows are picked directly rather than by a pass over the file)
+        picked = sorted(random.Random(seed).sample(range(n_first, len(index)), min(n_random, len(index) - n_first)))
+
+        return index.rows(0, n_first) + [index.row(i) for i in picked]
+
+
+    def _get_catalog_index(self) -> CatalogIndex:
+        """Returns the row index for self.src_path, shared with other processors & sessions reading the same
+        file (see open_catalog()); it's only rebuilt if the file has changed on disk.
+        """
+        return open_catalog(self.src_path)
 
 
     def set_file_col_headers(self, headers: list):
@@ -128,18 +262,22 @@ class CSVProc:
             raise RuntimeError(f"Mismatched header/column count ({len(headers)} vs. {self.file_num_cols}).")
 
 
-    def _add_lot_warning(self, lot: str, warning: str):
+    def _add_lot_warning(self, lot: str, warning: str, *, code: str = None, field: str = None):
         """Adds str param 'warning' to lot_warnings['lot'].
 
+        A matching machine-readable record is added to warning_records for structured output.
+
         Args:
             lot: Dict key of the lot to add a warning for.
             warning: Warning text to be displayed in logfile.
+            code: Warning code (one of the WARN constants).
+            field: The catalog column the warning concerns, if any.
         """
-        try:
-            if self._warning_not_exists(lot, warning):
-                self.lot_warnings[lot].append(warning)
-        except KeyError:
-            self.lot_warnings[lot] = [warning,]
+        if not self._warning_not_exists(lot, warning):
+            return
+
+        self.lot_warnings.setdefault(lot, []).append(warning)
+        self.warning_records.append({"lot": lot, "code": code, "field": field, "message": warning})
 
 
     def _warning_not_exists(self, lot: str, warning: str):
@@ -156,22 +294,77 @@ class CSVProc:
     def _load_af_csv(self):
         """Reads in data from an AuctionFlex-exported .csv catalog file.
 
-        Rows of the catalog file specified by self.src_path are stored as dicts in self.data.
+        Rows of the catalog file specified by self.src_path are stored as dicts in self.data. Large
+        catalogs are split on row boundaries and parsed in parallel. In merge mode (self.merge_paths),
+        the rows of every file are merged in lot order instead (see _read_batches()).
         """
         if len(self.file_headers) == 0 or len(self.file_headers) != self.file_num_cols:
             raise RuntimeError("Catalog load error: mismatch in header/column count.")
 
-        with open(self.src_path, "r", encoding="latin-1", newline="") as af_file:
-            self.data = []
-            reader = csv.DictReader(af_file, fieldnames=self.file_headers)
+        if self.merge_paths:
+            self.data = [record for (_, _, batch) in self._read_batches() for record in batch]
+        else:
+            self.data = self._get_catalog_index().read_all(self.file_headers, workers=self.parse_workers)
+
+
+    def _read_batches(self):
+        """Yields the catalog's rows (as dicts) in batches of at most self.store_batch_size.
 
-            self.data = [line for line in reader]
+        In merge mode, the rows of self.src_path & every file in self.merge_paths are merged in lot
+        order as they're read (see CatalogMerger); lot numbers found in more than one file & rows out
+        of lot order are warned about once every row has been read.
 
+        Yields:
+            tuple: (rows read so far, total rows, batch).
 
-    def _fix_descriptions(self):
+        Raises:
+            RuntimeError: If a merged file can't be read or has a different number of columns.
+        """
+        index = self._get_catalog_index()
+        if not self.merge_paths:
+            for (start, stop) in index.ranges(-(-len(index) // self.store_batch_size)):
+                yield (stop, len(index), index.rows(start, stop, self.file_headers))
+            return
+
+        # (merged files' indexes are shared like src_path's; see open_catalog())
+        sources = [(os.path.basename(self.src_path), index)]
+        for path in self.merge_paths:
+            try:
+                sources.append((os.path.basename(path), open_catalog(path)))
+            except OSError as e:
+                raise RuntimeError(f"Catalog load error: unable to read {path} ({e.strerror}).")
+            merged_index = sources[-1][1]
+            if len(merged_index) and len(merged_index.row(0)) != self.file_num_cols:
+                raise RuntimeError(f"Catalog load error: {path} has {len(merged_index.row(0))} columns "
+                                   f"(expected {self.file_num_cols}).")
+
+        merger = CatalogMerger(sources, self.file_headers, batch_size=self.store_batch_size,
+                               renumber=self.renumber_merged_lots)
+        rows_read = 0
+        for batch in merger.batches():
+            rows_read += len(batch)
+            yield (rows_read, len(merger), batch)
+
+        for (lot, names) in merger.collisions.items():
+            self._add_lot_warning(lot, f"Lot number used in more than one merged file ({', '.join(names)}).",
+                                  code=WARN.LOT_COLLISION, field="LotNum")
+        # (renumbered lots no longer have the numbers in the file, so these are reported for the whole catalog)
+        for (name, lot, previous) in merger.out_of_order:
+            self._add_lot_warning("0" if self.renumber_merged_lots else lot.upper(),
+                                  f"Lot {lot} of {name} is out of order (follows lot {previous}); the merged "
+                                  f"catalog may be out of order.", code=WARN.LOT_NUMBER, field="LotNum")
+
+
+    def _fix_descriptions(self, data: list = None):
         """Concatenates 'Desc. [1-5]' entries into a single dict entry, "Desc".
+
+        Args:
+            data: A list of dicts representing csv file rows (defaults to self.data).
         """
-        for record in self.data:
+        if data is None:
+            data = self.data
+
+        for record in data:
             record["Desc"] = record.pop("Desc. 1") + " " + record.pop("Desc. 2") + " " + record.pop("Desc. 3") \
                              + " " + record.pop("Desc. 4") + " " + record.pop("Desc. 5")
 
@@ -204,15 +397,38 @@ class CSVProc:
 
 
     def _process_conditions(self, data: list):
-        """Handles condition report truncation warning & boilerplate condition report substitution.
+        """Handles boilerplate condition report substitution (truncated conditions are found by
+        _check_truncation()).
         """
         if self.using_bp_condition:
             for record in data:
                 record["Condition"] = self.bp_condition
-        elif "Condition" in data[0].keys():
-            for record in data:
-                self._log_error_if(len(record["Condition"]) == 221, record, "Condition has likely been cut off by "
-                                                                            "AuctionFlex during export.")
+
+
+    def _new_truncation_profiler(self) -> TruncationProfiler:
+        """Returns a TruncationProfiler for the catalog's text columns (using the saved profile, if any).
+        """
+        fields = [f for f in ("Title", "Desc. 1", "Desc. 2", "Desc. 3", "Desc. 4", "Desc. 5", "Condition")
+                  if f in self.file_headers and not (f == "Condition" and self.using_bp_condition)]
+
+        if self.truncation_profile_path:
+            return TruncationProfiler.from_profile(fields, self.truncation_profile_path)
+        return TruncationProfiler(fields)
+
+
+    def _check_truncation(self, profiler: TruncationProfiler, *, save_profile: bool = True):
+        """Warns about fields cut off by AuctionFlex during export, once 'profiler' has observed every row.
+
+        Args:
+            profiler: a TruncationProfiler that observed the raw catalog rows (before _fix_descriptions()).
+            save_profile: store the learned column widths at self.truncation_profile_path (if set).
+        """
+        for (lot, field, width) in profiler.truncated():
+            self._add_lot_warning(lot, f"{field} has likely been cut off by AuctionFlex during export "
+                                       f"({width} characters).", code=WARN.TRUNCATED, field=field)
+
+        if save_profile and self.truncation_profile_path:
+            profiler.save(self.truncation_profile_path)
 
 
     @staticmethod
@@ -221,6 +437,52 @@ class CSVProc:
             record["LotNum"] = record["LotNum"].upper().strip()
 
 
+    def _get_number_parser(self) -> NumberParser:
+        if self._number_parser is None or self._number_parser.decimal_separator != self.decimal_separator:
+            self._number_parser = NumberParser(self.decimal_separator)
+
+        return self._number_parser
+
+
+    def _normalize_numeric_fields(self, data: list):
+        """Rewrites amounts that float() can't read as it should (ex: "$1,200", "1.200,00", "200-300") as plain
+        numbers, so that they pass _check_numeric_fields(). Logs a warning for each value rewritten.
+
+        An estimate range in LoEst or HiEst fills both fields when the other one is empty or holds the
+        same range. Values that can't be read unambiguously are left as they are.
+
+        Args:
+            data: A list of dicts representing csv file rows.
+        """
+        parser = self._get_number_parser()
+        for record in data:
+            for field in ("LoEst", "HiEst"):
+                other = "HiEst" if field == "LoEst" else "LoEst"
+                estimate_range = parser.parse_range(record.get(field) or "")
+                if (estimate_range is not None and other in record and
+                        (not (record[other] or "").strip() or record[other] == record[field])):
+                    self._add_lot_warning(record["LotNum"], f"Estimate range '{record[field]}' split into LoEst "
+                                                            f"{estimate_range[0]:.2f} & HiEst {estimate_range[1]:.2f}.",
+                                          code=WARN.NUMBER_FORMAT, field=field)
+                    (record["LoEst"], record["HiEst"]) = (f"{estimate_range[0]:.2f}", f"{estimate_range[1]:.2f}")
+
+            for field in ("Qty", "LoEst", "HiEst", "StartBid", "Reserve"):
+                raw = record.get(field)
+                if not raw:
+                    continue
+                value = parser.parse(raw)
+                if value is None:
+                    continue    # (reported by _check_numeric_fields())
+                try:
+                    if float(raw) == value:
+                        continue
+                except ValueError:
+                    pass
+                record[field] = f"{value:.2f}"
+                self._add_lot_warning(record["LotNum"], f"{field} '{raw.strip()}' read as {value:.2f}.",
+                                      code=WARN.NUMBER_FORMAT, field=field)
+
+
     def _check_numeric_fields(self, data: list):
         """Checks parsability of numeric fields by attempting conversion to float or int as appropriate.
 
@@ -232,34 +494,96 @@ class CSVProc:
         Returns:
             bool: Whether all numeric fields are parsable as numbers.
         """
-        all_numeric = True
+        # (a list rather than a generator so that every record gets checked & warned about)
+        return all([self._record_is_numeric(record) for record in data])
+
+
+    def _record_is_numeric(self, record: dict) -> bool:
+        """Checks the numeric fields of a single record (see _check_numeric_fields()), logging warnings.
+        """
+        problems = self._numeric_problems(record)
+        for (field, message) in problems:
+            self._add_lot_warning(record["LotNum"], message, code=WARN.NOT_NUMERIC, field=field)
+
+        return not problems
 
-        for record in data:
-            if "Qty" in record.keys():
-                try:
-                    float(record["Qty"])
-                except ValueError:
-                    self._add_lot_warning(record["LotNum"], "Qty. field not parsable as a number.")
-                    all_numeric = False
 
+    @staticmethod
+    def _numeric_problems(record: dict) -> list:
+        """Returns (field, message) for each numeric field of 'record' that isn't parsable as a number.
+        """
+        problems = []
+
+        if "Qty" in record.keys():
             try:
-                float(record["LoEst"])
-                float(record["HiEst"])
-                float(record["StartBid"])
+                float(record["Qty"])
             except ValueError:
-                self._add_lot_warning(record["LotNum"], "Lo/HiEst or StartBid field not parsable as a number.")
-                all_numeric = False
-            except KeyError:    # in case StartBid is not defined
-                pass
+                problems.append(("Qty", "Qty. field not parsable as a number."))
+
+        try:
+            float(record["LoEst"])
+            float(record["HiEst"])
+            float(record["StartBid"])
+        except ValueError:
+            problems.append(("LoEst", "Lo/HiEst or StartBid field not parsable as a number."))
+        except KeyError:    # in case StartBid is not defined
+            pass
+
+        if "Reserve" in record.keys():
+            try:
+                float(record["Reserve"])
+            except ValueError:
+                problems.append(("Reserve", "Reserve field not parsable as a number."))
+
+        return problems
 
-            if "Reserve" in record.keys():
-                try:
-                    float(record["Reserve"])
-                except ValueError:
-                    self._add_lot_warning(record["LotNum"], "Reserve field not parsable as a number.")
-                    all_numeric = False
 
-        return all_numeric
+    def _quarantine_invalid_rows(self, data: list, platform: str, *, check_lot_numbers: bool = False):
+        """Removes rows that would abort an export from 'data' (in place), setting them aside with their
+        reasons so they can be written to a reject file instead (see _write_rejected_lots()).
+
+        Rows with non-numeric numeric fields are removed, as are (if 'check_lot_numbers') rows whose lot
+        number can't be split by _split_lot_ext(). Warnings are logged for each problem as usual.
+
+        Args:
+            platform: export file prefix of the platform being prepared (ex: "Invalu").
+        """
+        kept = []
+        for record in data:
+            numeric = self._record_is_numeric(record)
+            valid_lot = not check_lot_numbers or self._check_lot_number(record["LotNum"])
+            if numeric and valid_lot:
+                kept.append(record)
+                continue
+
+            reasons = [message for (_, message) in self._numeric_problems(record)]
+            if not valid_lot:
+                reasons.append("Lot number contains non-terminating A-Z character(s).")
+
+            rejected = self._rejected_lots.setdefault(record["LotNum"], {"record": dict(record), "platforms": {},
+                                                                         "reasons": {}})
+            rejected["platforms"][platform] = None
+            rejected["reasons"].update(dict.fromkeys(reasons))
+
+        data[:] = kept
+
+
+    def _write_rejected_lots(self):
+        """Writes the rows set aside by _quarantine_invalid_rows() to a reject file in self.dest_path.
+
+        Each row keeps its catalog columns and gains the platform(s) it was left out of & why.
+        """
+        rejected = list(self._rejected_lots.values())
+        columns = list(dict.fromkeys(key for lot in rejected for key in lot["record"]))
+
+        filename = "Rejected_lots_" + self._get_timestamp() + ".csv"
+        with self._open_output(filename, newline="") as reject_file:
+            writer = csv.DictWriter(reject_file, columns + ["Rejected From", "Reasons"])
+            writer.writeheader()
+            for lot in rejected:
+                writer.writerow({**lot["record"],
+                                 "Rejected From": ", ".join(self.PLATFORM_NAMES[p] for p in lot["platforms"]),
+                                 "Reasons": " ".join(lot["reasons"])})
 
 
     def _check_related_columns(self, data: list):
@@ -273,41 +597,72 @@ class CSVProc:
         # if H, W, or D are defined, dimension unit should also be defined (and vice-versa)
         if any([field for field in ("Height", "Width", "Depth") if field in first_record.keys()]):
             if "DimUnit" not in first_record.keys():
-                self._add_lot_warning("0", "H/W/D column(s) defined but co-requisite Dim[ension]Unit column is not.")
+                self._add_lot_warning("0", "H/W/D column(s) defined but co-requisite Dim[ension]Unit column is not.",
+                                      code=WARN.MISSING_COLUMN, field="DimUnit")
             else:
                 # check all records with H/W/D defined for blank DimUnit fields
                 for record in data:
                     if any([record[field] for field in ("Height", "Width", "Depth") if field in record.keys()]) and not record["DimUnit"]:
-                        self._add_lot_warning(record["LotNum"], "Missing dimension unit.")
+                        self._add_lot_warning(record["LotNum"], "Missing dimension unit.",
+                                              code=WARN.MISSING_UNIT, field="DimUnit")
         elif "DimUnit" in first_record.keys():
             if not any([field for field in ("Height", "Width", "Depth") if field in first_record.keys()]):
-                self._add_lot_warning("0", "DimUnit column defined but co-requisite H/W/D column(s) are not.")
+                self._add_lot_warning("0", "DimUnit column defined but co-requisite H/W/D column(s) are not.",
+                                      code=WARN.MISSING_COLUMN, field="Height")
 
         # if Weight is defined, weight unit should be as well (and vice-versa)
         if "Weight" in first_record.keys():
             if "WtUnit" not in first_record.keys():
-                self._add_lot_warning("0", "Weight column defined but co-requisite W[eigh]tUnit column is not.")
+                self._add_lot_warning("0", "Weight column defined but co-requisite W[eigh]tUnit column is not.",
+                                      code=WARN.MISSING_COLUMN, field="WtUnit")
             else:
                 # check all records with Weight defined for blank WtUnit fields
                 for record in data:
                     if record["Weight"] and not record["WtUnit"]:
-                        self._add_lot_warning(record["LotNum"], "Missing weight unit.")
+                        self._add_lot_warning(record["LotNum"], "Missing weight unit.",
+                                              code=WARN.MISSING_UNIT, field="WtUnit")
         elif "WtUnit" in first_record.keys():
             if "Weight" not in first_record.keys():
-                self._add_lot_warning("0", "WtUnit column defined but co-requisite Weight column is not.")
+                self._add_lot_warning("0", "WtUnit column defined but co-requisite Weight column is not.",
+                                      code=WARN.MISSING_COLUMN, field="Weight")
 
         # if Consignor is defined, Ref# should be as well (and vice-versa)
         if "Consign#" in first_record.keys():
             if "Ref#" not in first_record.keys():
-                self._add_lot_warning("0", "Consign# column defined but co-requisite Ref# column is not.")
+                self._add_lot_warning("0", "Consign# column defined but co-requisite Ref# column is not.",
+                                      code=WARN.MISSING_COLUMN, field="Ref#")
             else:
                 # check all records with Consign# defined for blank Ref# fields
                 for record in data:
                     if record["Consign#"] and not record["Ref#"]:
-                        self._add_lot_warning(record["LotNum"], "Missing consignor lot reference number.")
+                        self._add_lot_warning(record["LotNum"], "Missing consignor lot reference number.",
+                                              code=WARN.MISSING_REF, field="Ref#")
         elif "Ref#" in first_record.keys():
             if "Consign#" not in first_record.keys():
-                self._add_lot_warning("0", "Ref# column defined but co-requisite Consign# column is not.")
+                self._add_lot_warning("0", "Ref# column defined but co-requisite Consign# column is not.",
+                                      code=WARN.MISSING_COLUMN, field="Consign#")
+
+
+    def _check_constraints(self, data: list):
+        """Checks the catalog-wide key rules (self.unique_keys & self.key_dependencies; see ConstraintChecker).
+
+        Rules naming a column the catalog doesn't have are ignored. Rows from earlier calls in the same
+        run (ex: previous batches) are remembered, so each conflict is reported once, on the later lot.
+
+        Args:
+            data: A list of dicts representing csv file rows (with uppercased lot numbers).
+        """
+        if self._constraints is None:
+            columns = set(self.file_headers)
+            self._constraints = ConstraintChecker(
+                [fields for fields in self.unique_keys if columns.issuperset(fields)],
+                [(determinant, dependent) for (determinant, dependent) in self.key_dependencies
+                 if columns.issuperset(determinant) and columns.issuperset(dependent)])
+
+        for record in data:
+            for (kind, field, message) in self._constraints.observe(record["LotNum"], record):
+                self._add_lot_warning(record["LotNum"], message, field=field,
+                                      code=WARN.DUPLICATE_KEY if kind == "unique" else WARN.KEY_CONFLICT)
 
 
     @staticmethod
@@ -338,6 +693,44 @@ class CSVProc:
                     record["StartBid"] = 0.5 * float(record["LoEst"])
 
 
+    def _repair_text(self, data: list):
+        """Replaces non-ASCII & unprintable characters in the Title, Desc & Condition fields.
+
+        Each field that isn't plain ASCII is fixed with a single str.translate() call using a table
+        built from TextRepair.DEFAULT_SUBSTITUTIONS and self.text_substitutions. Characters with no
+        replacement are left in place and reported as warnings. If self.repair_text is False, nothing is replaced
+        and every such character is reported.
+
+        Args:
+            data: A list of dicts representing csv file rows (with concatenated "Desc" fields).
+        """
+        table = build_translation_table(self.text_substitutions) if self.repair_text else None
+        fields = [(field, name) for (field, name) in (("Title", "Title"), ("Desc", "Description"),
+                                                      ("Condition", "Condition")) if field in data[0].keys()]
+
+        for record in data:
+            for (field, name) in fields:
+                value = record[field]
+                # (most fields are plain, printable ASCII: nothing to translate or report)
+                if value is None or (value.isascii() and value.isprintable()):
+                    continue
+                if table is not None:
+                    value = record[field] = value.translate(table)
+
+                leftover = unmapped_characters(value)
+                if not leftover:
+                    continue
+
+                non_ascii = "".join(c for c in leftover if c.isprintable())
+                unprintable = "".join(repr(c)[1:-1] for c in leftover if not c.isprintable())
+                if non_ascii:
+                    self._add_lot_warning(record["LotNum"], f"{name} contains non-ASCII character(s): {non_ascii}",
+                                          code=WARN.NON_ASCII, field=field)
+                if unprintable:
+                    self._add_lot_warning(record["LotNum"], f"{name} contains unprintable character(s): "
+                                                            f"{unprintable}", code=WARN.UNPRINTABLE, field=field)
+
+
     @staticmethod
     def _format_whitespace(data: list):
         """Fixes whitespace irregularities in all records & fields of param 'data'.
@@ -371,39 +764,39 @@ class CSVProc:
         for record in data:
             # checks for required fields
             if "  " in record["Desc"]:
-                self._add_lot_warning(record["LotNum"], "Double space found.")
+                self._add_lot_warning(record["LotNum"], "Double space found.", code=WARN.DOUBLE_SPACE, field="Desc")
             if not record["Desc"].endswith(('.', ')')):
-                self._add_lot_warning(record["LotNum"], "Description ends with a character other than '.' or ')'.")
-            if not record["Desc"].isascii():
-                self._add_lot_warning(record["LotNum"], "Description contains non-ASCII character(s).")
-            if not record["Desc"].isprintable():
-                self._add_lot_warning(record["LotNum"], "Description contains unprintable character(s).")
+                self._add_lot_warning(record["LotNum"], "Description ends with a character other than '.' or ')'.",
+                                      code=WARN.PUNCTUATION, field="Desc")
             if len(record["Title"]) > 60:
-                self._add_lot_warning(record["LotNum"], "Title longer than 60 characters.")
+                self._add_lot_warning(record["LotNum"], "Title longer than 60 characters.",
+                                      code=WARN.TITLE_LENGTH, field="Title")
 
             # checks for optional fields
             if "LoEst" in record.keys() and "HiEst" in record.keys():
                 if float(record["LoEst"]) >= float(record["HiEst"]):
-                    self._add_lot_warning(record["LotNum"], "Low estimate greater than or equal to high estimate.")
+                    self._add_lot_warning(record["LotNum"], "Low estimate greater than or equal to high estimate.",
+                                          code=WARN.ESTIMATE_ORDER, field="LoEst")
                 if float(record["LoEst"]) < 10.00 or float(record["HiEst"]) < 10.00 or \
                         float(record.get("StartBid", float(record["LoEst"]) / 2.0)) < 5.00:
-                    self._add_lot_warning(record["LotNum"], "Lo/HiEst is below $10 or StartBid is below $5.")
+                    self._add_lot_warning(record["LotNum"], "Lo/HiEst is below $10 or StartBid is below $5.",
+                                          code=WARN.LOW_VALUE, field="LoEst")
 
             if "Condition" in record.keys():
-                self._log_error_if(not record["Condition"].isprintable(), record, "Condition contains unprintable "
-                                                                               "character(s).")
-                self._log_error_if(not record["Condition"].isascii(), record, "Condition contains non-ASCII character(s).")
-                self._log_error_if(not record["Condition"].endswith(('.', ')')), record, "Condition ends with a character other than '.' or ')'.")
+                self._log_error_if(not record["Condition"].endswith(('.', ')')), record, "Condition ends with a character other than '.' or ')'.",
+                                   code=WARN.PUNCTUATION, field="Condition")
 
             if "StartBid" in record.keys():
-                self._log_error_if(float(record["StartBid"]) > float(record["LoEst"]), record, "StartBid greater than low estimate.")
+                self._log_error_if(float(record["StartBid"]) > float(record["LoEst"]), record, "StartBid greater than low estimate.",
+                                   code=WARN.STARTBID_ABOVE_EST, field="StartBid")
                 self._log_error_if(float(record["StartBid"]) > float(record["HiEst"]), record, "StartBid greater than "
-                                                                                           "high estimate.")
+                                                                                           "high estimate.",
+                                   code=WARN.STARTBID_ABOVE_EST, field="StartBid")
 
 
-    def _log_error_if(self, condition, curr_record, error_str):
+    def _log_error_if(self, condition, curr_record, error_str, *, code: str = None, field: str = None):
         if condition:
-            self._add_lot_warning(curr_record["LotNum"], error_str)
+            self._add_lot_warning(curr_record["LotNum"], error_str, code=code, field=field)
 
 
     def _split_lot_ext(self, data: list):
@@ -421,15 +814,28 @@ class CSVProc:
         for record in data:
             lot_num = record["LotNum"]
 
+            if not self._check_lot_number(lot_num):
+                raise ValueError(f"Unexpected alpha character(s) in lot {lot_num}.")
+
             if lot_num.isdecimal():
                 record["LotExt"] = ""
             else:
-                if lot_num[:-1].isdecimal() and lot_num[-1:].isalpha():
-                    record["LotExt"] = lot_num[-1:]
-                    record["LotNum"] = lot_num[:-1]
-                else:
-                    self._add_lot_warning(lot_num, "Lot number contains non-terminating A-Z character(s).")
-                    raise ValueError(f"Unexpected alpha character(s) in lot {lot_num}.")
+                record["LotExt"] = lot_num[-1:]
+                record["LotNum"] = lot_num[:-1]
+
+
+    def _check_lot_number(self, lot_num: str) -> bool:
+        """Checks that 'lot_num' is numeric with at most one terminating alpha character (ex: 205 or 205A).
+
+        Returns:
+            bool: Whether the lot number is valid (a warning is logged if not).
+        """
+        if lot_num.isdecimal() or (lot_num[:-1].isdecimal() and lot_num[-1:].isalpha()):
+            return True
+
+        self._add_lot_warning(lot_num, "Lot number contains non-terminating A-Z character(s).",
+                              code=WARN.LOT_NUMBER, field="LotNum")
+        return False
 
 
     def _add_missing_export_headers(self, data: list):
@@ -448,39 +854,295 @@ class CSVProc:
                     self.export_file_headers.append(header)
 
 
-    # this is in-progress/experimental... might finish it later
     def _check_title_quantities(self, data: list):
-        """Attempts to check whether quantity in lot title matches value in the "Qty" field.
+        """Checks whether the quantity described in a lot's title matches the value in its "Qty" field.
+
+        Every quantity expression in the title is found in a single pass of TITLE_QTY_RE and
+        the quantities are summed, ex: "Pair of Vases & (3) Plates" totals 5. Titles without any
+        quantity expression are not checked.
 
         Args:
             data (list[dict]): A list of dicts representing csv file rows.
         """
-        eng_qtys = re.compile(r"\b(?:two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)\b", re.IGNORECASE)
-        eng_ints = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
-                    "ten": 10, "eleven": 11, "twelve": 12}
+        if "Qty" not in data[0].keys():
+            return
 
         for record in data:
-            try:
-                # look for spelled-out quantities
-                if re.search("^pair", record["Title"], re.IGNORECASE) and record["Qty"] != "2":
-                    self._add_lot_warning(record["LotNum"], "Title contains 'pair' but qty. is not 2.")
-                # TODO: add support for "lot of #" and "# pieces"
-
-                # sum numeric quantities in title
-                title_qtys = re.findall(r"\(\d+\)", record["Title"])
-                total_qty = 0
-                for q in title_qtys:
-                    total_qty += int(q)
-
-                # sum english quantities in title
-                title_eng_qtys = eng_qtys.findall(record["Title"])
-                for q in title_eng_qtys:
-                    total_qty += eng_ints[q]
+            total_qty = 0
+            for match in TITLE_QTY_RE.finditer(record["Title"]):
+                kind = match.lastgroup
+                if kind == "pair":
+                    total_qty += 2
+                else:
+                    qty = match.group(kind).lower()
+                    qty = int(qty) if qty.isdecimal() else ENG_QTYS[qty]
+                    total_qty += qty * {"pairs": 2, "dozens": 12}.get(kind, 1)
 
+            if total_qty == 0:
+                continue
+
+            try:
                 if total_qty != float(record["Qty"]):
-                    self._add_lot_warning(record["LotNum"], "Possible mismatch between title & quantity.")
-            except KeyError:    # in case Qty is not defined
-                pass
+                    self._add_lot_warning(record["LotNum"], f"Title describes {total_qty} items but qty. is "
+                                                            f"{record['Qty']}.", code=WARN.QTY_MISMATCH, field="Title")
+            except ValueError:
+                pass    # already reported by _check_numeric_fields()
+
+
+    def _reset_near_duplicates(self):
+        """Starts a new near-duplicate pass (lots seen by earlier _find_near_duplicates() calls are forgotten).
+
+        When processing from a disk store, the index of this catalog's lots is kept in the store's database.
+        """
+        if self._duplicate_detectors is not None and self._duplicate_detectors[1] is not None:
+            self._duplicate_detectors[1].close()
+
+        detector = DuplicateDetector(threshold=self.near_duplicate_threshold,
+                                     db=self._store.connection if self._store is not None else None)
+        past_catalogs = None
+        if self.duplicate_index_path:
+            past_catalogs = DuplicateDetector(threshold=self.near_duplicate_threshold)
+            try:
+                past_catalogs.load(self.duplicate_index_path)
+            except (OSError, ValueError):
+                past_catalogs = None    # index doesn't exist yet (or is unreadable)
+
+        self._duplicate_detectors = (detector, past_catalogs)
+
+
+    def _find_near_duplicates(self, data: list):
+        """Flags lots whose title & description are nearly identical to another lot's.
+
+        Lots are compared against the rest of this catalog and, if self.duplicate_index_path is set,
+        against lots stored from previous catalogs. Uses MinHash/LSH (see DuplicateDetector) rather
+        than comparing every pair of lots. Lots from earlier calls (ex: previous batches) are remembered
+        until _reset_near_duplicates() is called.
+
+        Args:
+            data: A list of dicts representing csv file rows (with concatenated "Desc" fields).
+        """
+        if self._duplicate_detectors is None:
+            self._reset_near_duplicates()
+        detector, past_catalogs = self._duplicate_detectors
+        auction = self._get_auction_id()
+
+        for record in data:
+            lot = record["LotNum"]
+            signature = detector.signature(record["Title"] + " " + record["Desc"])
+
+            # (only the later lot of a pair is flagged; the message names the earlier one)
+            matches = sorted(detector.query(signature), key=lambda m: (-m[1], str(m[0])))[:3]
+            if matches:
+                others = ", ".join(f"{other_lot} (~{similarity:.0%})" for (other_lot, similarity) in matches)
+                self._add_lot_warning(lot, f"Title/description nearly identical to lot(s) {others}.",
+                                      code=WARN.NEAR_DUPLICATE, field="Desc")
+
+            if past_catalogs is not None:
+                matches = sorted(((key, similarity) for (key, similarity) in past_catalogs.query(signature)
+                                  if key[0] != auction), key=lambda m: (-m[1], str(m[0])))[:3]
+                if matches:
+                    others = ", ".join(f"lot {other_lot} of {other_auction} (~{similarity:.0%})"
+                                       for ((other_auction, other_lot), similarity) in matches)
+                    self._add_lot_warning(lot, f"Title/description nearly identical to {others}.",
+                                          code=WARN.NEAR_DUPLICATE, field="Desc")
+
+            detector.add(lot, signature)
+
+
+    def _check_estimate_outliers(self, records):
+        """Warns about lots whose estimates or reserve are far out of line with the rest of the catalog
+        (ex: a missing or extra zero), using robust z-scores (see EstimateOutliers).
+
+        Args:
+            records: every lot of the catalog, as dicts with "LotNum", "LoEst" & "HiEst" (and optionally
+                "Reserve") fields. Lots with missing or non-numeric values are skipped.
+        """
+        if not self.check_estimate_outliers:
+            return
+
+        parser = self._get_number_parser()
+        lots, lo_ests, hi_ests, reserves = [], [], [], []
+        for record in records:
+            lo_est = parser.parse(record.get("LoEst") or "")
+            hi_est = parser.parse(record.get("HiEst") or "")
+            reserve = parser.parse(record.get("Reserve") or "0")
+            if lo_est is None or hi_est is None or reserve is None:
+                continue
+
+            lots.append(record["LotNum"])
+            lo_ests.append(lo_est)
+            hi_ests.append(hi_est)
+            reserves.append(reserve)
+
+        outliers = find_estimate_outliers(lots, lo_ests, hi_ests, reserves if any(reserves) else None,
+                                          threshold=self.outlier_z_threshold)
+        for (lot, field, message) in outliers:
+            self._add_lot_warning(lot, message, code=WARN.ESTIMATE_OUTLIER, field=field)
+
+
+    def _check_images(self, data: list):
+        """Warns about lots whose preview images (in self.image_dir) are missing, empty or corrupt.
+
+        The image folder is listed on first use in a run; lots are then checked in parallel (see ImageManifest).
+        Lots with invalid lot numbers are skipped (they are reported by _check_lot_number()).
+
+        Args:
+            data: A list of dicts representing csv file rows (before _split_lot_ext()).
+
+        Raises:
+            ValueError: If the image folder can't be read.
+        """
+        if not self.image_dir:
+            return
+
+        if self._image_manifest is None:
+            try:
+                self._image_manifest = ImageManifest(self.image_dir, pattern=self.image_pattern,
+                                                     images_per_lot=self.images_per_lot, workers=self.image_workers)
+            except OSError as e:
+                raise ValueError(f"Unable to read image folder {self.image_dir} ({e.strerror}).")
+
+        lots = {}
+        for record in data:
+            lot_num = record["LotNum"]
+            if lot_num.isdecimal():
+                lots[(lot_num, "")] = lot_num
+            elif lot_num[:-1].isdecimal() and lot_num[-1:].isalpha():
+                lots[(lot_num[:-1], lot_num[-1:])] = lot_num
+
+        for (key, problems) in self._image_manifest.check(list(lots)).items():
+            for (image, problem) in problems:
+                if problem == "missing":
+                    self._add_lot_warning(lots[key], f"Image {image} is missing.", code=WARN.MISSING_IMAGE,
+                                          field="Image")
+                else:
+                    self._add_lot_warning(lots[key], f"Image {image} is {problem}.", code=WARN.INVALID_IMAGE,
+                                          field="Image")
+
+
+    def _get_spell_checker(self) -> SpellChecker:
+        """Returns the SpellChecker for the configured word list & glossary (loaded once & reused, along
+        with its cache of checked tokens, until either path changes).
+
+        Raises:
+            ValueError: If the word list or glossary can't be read.
+        """
+        paths = (self.spelling_word_list_path, self.spelling_glossary_path)
+        if self._spell_checker is None or self._spell_checker[0] != paths:
+            try:
+                self._spell_checker = (paths, SpellChecker.from_files(*paths))
+            except OSError as e:
+                raise ValueError(f"Unable to read spelling word list {e.filename} ({e.strerror}).")
+
+        return self._spell_checker[1]
+
+
+    def _check_spelling(self, data: list):
+        """Warns about possibly misspelled words in the Title & Desc fields (if a word list is configured).
+
+        Args:
+            data: A list of dicts representing csv file rows (with concatenated "Desc" fields).
+
+        Raises:
+            ValueError: If the word list or glossary can't be read.
+        """
+        if not self.spelling_word_list_path:
+            return
+
+        checker = self._get_spell_checker()
+        for record in data:
+            for (field, name) in (("Title", "Title"), ("Desc", "Description")):
+                misspelled = checker.check(record[field])
+                if misspelled:
+                    words = ", ".join(f"{token} ({suggestions[0]}?)" if suggestions else token
+                                      for (token, suggestions) in misspelled[:10])
+                    if len(misspelled) > 10:
+                        words += f" & {len(misspelled) - 10} more"
+                    self._add_lot_warning(record["LotNum"], f"Possible misspelling(s) in {name}: {words}",
+                                          code=WARN.SPELLING, field=field)
+
+
+    def _stage_lot_history(self, data: list, *, read_only: bool = False):
+        """Adds processed rows to this run's lots, which _check_lot_history() compares against (and saves
+        to) the lot history at self.lot_history_path.
+
+        Args:
+            data: A list of dicts representing csv file rows (with concatenated "Desc" fields).
+            read_only: open the lot history read-only (for validation; a history that doesn't exist
+                yet is skipped rather than created).
+
+        Raises:
+            ValueError: If the lot history database can't be opened.
+        """
+        if not self.lot_history_path:
+            return
+        if read_only and self._lot_history is None and not os.path.isfile(self.lot_history_path):
+            return
+
+        try:
+            if self._lot_history is None:
+                self._lot_history = LotHistory(self.lot_history_path, os.path.basename(self.src_path),
+                                               self._get_auction_id(), read_only=read_only)
+            self._lot_history.stage(data)
+        except sqlite3.Error as e:
+            raise ValueError(f"Unable to open lot history {self.lot_history_path} ({e}).")
+
+
+    def _get_auction_id(self) -> str:
+        """Returns the id this auction's lots are kept under in the lot history & duplicate index: the
+        configured auction id, or else the catalog's file name.
+        """
+        return self.auction_id or os.path.basename(self.src_path)
+
+
+    def _check_lot_history(self, *, save: bool = True):
+        """Warns about lots offered in a previous catalog (same Consign# & Ref#, or the same title &
+        description) whose estimates, reserve or text have changed since, then closes the lot history.
+
+        Args:
+            save: record this run's lots in the lot history for future catalogs.
+
+        Raises:
+            ValueError: If the lot history database can't be read or updated.
+        """
+        if self._lot_history is None:
+            return
+
+        def money(value):
+            return f"${value:,.0f}" if value else "none"
+
+        try:
+            for (current, previous) in self._lot_history.previous_offerings():
+                lot = current["lot"]
+                offered = f"Re-offered from {previous['catalog']} (lot {previous['lot']})"
+
+                if (current["lo_est"], current["hi_est"]) != (previous["lo_est"], previous["hi_est"]):
+                    self._add_lot_warning(lot, f"{offered} with different estimates: {money(previous['lo_est'])}-"
+                                               f"{money(previous['hi_est'])} then, {money(current['lo_est'])}-"
+                                               f"{money(current['hi_est'])} now.",
+                                          code=WARN.REOFFERED_ESTIMATE, field="LoEst")
+                if (current["reserve"] or 0) != (previous["reserve"] or 0):
+                    self._add_lot_warning(lot, f"{offered} with a different reserve: {money(previous['reserve'])} "
+                                               f"then, {money(current['reserve'])} now.",
+                                          code=WARN.REOFFERED_ESTIMATE, field="Reserve")
+
+                changed = [field for field in ("title", "description") if current[field] != previous[field]]
+                if changed:
+                    self._add_lot_warning(lot, f"{offered} with a different {' & '.join(changed)}.",
+                                          code=WARN.REOFFERED_TEXT, field="Title" if changed[0] == "title" else "Desc")
+
+            if save:
+                self._lot_history.save()
+        except sqlite3.Error as e:
+            raise ValueError(f"Unable to update lot history {self.lot_history_path} ({e}).")
+        finally:
+            self._close_lot_history()
+
+
+    def _close_lot_history(self):
+        if self._lot_history is not None:
+            self._lot_history.close()
+            self._lot_history = None
 
 
     def _generate_warning_log(self):
@@ -489,12 +1151,10 @@ class CSVProc:
         Exports the contents of lot_warnings to a text file.
         """
         filename = "Export_warnings_" + self._get_timestamp() + ".txt"
-        path = os.path.join(self.dest_path, filename)
-
         warning_count = self.count_warnings()
         sorted_warnings = self._get_sorted_warnings()
 
-        with open(path, "w") as log_file:
+        with self._open_output(filename) as log_file:
             log_file.write(80*'#' + '\n')
             log_file.write(f"{C.PROGRAM_NAME}".center(80) + '\n')
             log_file.write("~ Warnings ~".center(80) + '\n')
@@ -512,29 +1172,72 @@ class CSVProc:
                 log_file.write('\n')
 
 
+    def _generate_warning_records(self):
+        """Writes lot warnings as machine-readable records.
+
+        Records go to a JSON Lines file next to the text log (if self.write_warning_records) and are
+        appended to the SQLite database at self.warning_db_path (if set).
+        """
+        store = WarningStore(os.path.basename(self.src_path))
+
+        # look up each lot's consignor so warnings can be grouped by consignor later (from the catalog, so
+        #   quarantined lots get theirs too)
+        consignors = self._get_consignors()
+
+        if self.write_warning_records:
+            filename = "Export_warnings_" + self._get_timestamp() + ".jsonl"
+            with self._open_output(filename) as jsonl_file:
+                store.write_jsonl(jsonl_file, self.warning_records, consignors)
+
+        if self.warning_db_path:
+            store.write_sqlite(self.warning_db_path, self.warning_records, consignors)
+
+
+    def _new_consignor_report(self):
+        """Returns a ConsignorReport for this run (None if no consignor report is written).
+
+        When processing from a disk store, the report keeps its per-lot data in the store's database.
+        """
+        if not (self.write_catalog_summary or self.write_consignor_lot_lists):
+            return None
+
+        return ConsignorReport(keep_lots=self.write_consignor_lot_lists,
+                               db=self._store.connection if self._store is not None else None)
+
+
+    def _write_consignor_reports(self):
+        """Writes the catalog summary (totals & warnings per consignor) and each consignor's lot list to
+        self.dest_path, as enabled by self.write_catalog_summary & self.write_consignor_lot_lists.
+        """
+        report = self._consignor_report
+        if self.write_catalog_summary:
+            with self._open_output(f"Catalog_summary_{self._get_timestamp()}.csv", newline="") as summary_file:
+                report.write_summary(summary_file, self.warning_records)
+
+        if self.write_consignor_lot_lists:
+            for consignor in report.lot_list_consignors():
+                # (consignor numbers go into file names; keep them safe for any file system)
+                name = re.sub(r"[^\w-]", "_", consignor)
+                with self._open_output(f"Consignor_{name}_lots_{self._get_timestamp()}.csv",
+                                       newline="") as lots_file:
+                    report.write_lots(lots_file, consignor)
+
+
     def _get_sorted_warnings(self) -> OrderedDict:
         return OrderedDict(sorted(self.lot_warnings.items(), key=self._sort_value_with_alpha))
 
 
     @staticmethod
-    def _sort_value_with_alpha(s) -> float:
+    def _sort_value_with_alpha(s) -> tuple:
         """Sorts lot numbers by value (ascending), accounting for alpha-extensions (ex. lot 205A)
 
         Args:
             s: lot_warnings dictionary tuple
 
         Returns:
-            float: value used to index sort
-        """
-        dict_key = s[0]
-        if dict_key.isnumeric():
-            return float(dict_key)
-        elif re.search("[a-z]$", dict_key, re.IGNORECASE):
-            numeric_part = float(dict_key[:-1])
-            letter_part = float(ord(dict_key[-1].upper())) / 100.0
-            return numeric_part + letter_part
-        else:
-            return -1
+            tuple: value used to index sort (see CatalogMerge.lot_sort_key())
+        """
+        return lot_sort_key(s[0])
 
 
     def count_warnings(self) -> int:
@@ -548,9 +1251,30 @@ class CSVProc:
 
 
     def _export_invaluable(self, data: list, progress_callback, error_callback):
-        filename = "Invalu_Export_" + self._get_timestamp() + ".csv"
-        path = os.path.join(self.dest_path, filename)
+        self._reset_near_duplicates()
+        if self._prepare_invaluable(data, progress_callback, error_callback):
+            progress_callback(29)
+            snapshot = self._get_export_snapshot("Invalu", self.INV_KEY_FIELDS)
+            with self._open_export(self._get_export_filename("Invalu")) as inv_file:
+                writer = self._get_export_writer(inv_file, self.inv_headers)
+                self._write_export_rows(writer, data, self.inv_headers, snapshot, self.delta_export)
+            self._finish_export_snapshot(snapshot, "Invalu")
+        else:
+            self._consignor_report = None   # (no lots were exported to report on)
+            error_callback("Non-numeric value encountered in a numeric field; export aborted.")
 
+
+    def _prepare_invaluable(self, data: list, progress_callback, error_callback) -> bool:
+        """Runs the Invaluable processing stages on 'data' (in place).
+
+        Returns:
+            bool: False if a numeric field can't be parsed (export should be aborted). In quarantine
+                mode, failing rows are removed from 'data' instead and True is returned.
+
+        Raises:
+            RuntimeError: If a required column is missing.
+            ValueError: If a lot number can't be split into numeric & alpha parts (unless in quarantine mode).
+        """
         # verify that required fields are all present
         try:
             self._check_required_columns(data, self.required_headers_inv)
@@ -560,45 +1284,75 @@ class CSVProc:
 
         # process data for upload to Invaluable
         self._uppercase_lotnums(data)
+        self._normalize_numeric_fields(data)
         progress_callback(8)
-        if self._check_numeric_fields(data):
-            self._check_related_columns(data)
-            progress_callback(11)
-            self._process_conditions(data)
-            progress_callback(14)
-            self._process_startbids(data)
-            progress_callback(17)
-            self._format_whitespace(data)
-            progress_callback(20)
-            self._find_errors(data)
-            progress_callback(23)
-            self._split_lot_ext(data)
-            progress_callback(26)
-            self._convert_numeric_to_int(data)
-            self._add_missing_export_headers(data)
-            # self._check_title_quantities(data)
-
-            # create header row (for ordering purposes)
-            exp_headers = [self.inv_headers[h] for h in self.export_file_headers if h in self.inv_headers]
-            progress_callback(29)
+        if self.quarantine_rows:
+            self._quarantine_invalid_rows(data, "Invalu", check_lot_numbers=True)
+            if not data:
+                return True
+        elif not self._check_numeric_fields(data):
+            return False
 
-            with open(path, "w", newline="") as inv_file:
-                writer = csv.DictWriter(inv_file, exp_headers)
-                writer.writeheader()
-                for line in data:
-                    # map AFlex header keys to Invaluable header keys
-                    new_line = {self.inv_headers[key]: val for (key, val) in line.items() if key in
-                                self.inv_headers.keys()}
-                    writer.writerow(new_line)
+        self._check_related_columns(data)
+        # (key columns are identical for both platforms, so this check only runs here)
+        self._check_constraints(data)
+        progress_callback(11)
+        self._process_conditions(data)
+        progress_callback(14)
+        self._process_startbids(data)
+        progress_callback(17)
+        self._repair_text(data)
+        self._format_whitespace(data)
+        progress_callback(20)
+        self._find_errors(data)
+        # (from the disk store, 'data' is one batch; the whole catalog is checked in _process_from_store())
+        if self._store is None:
+            self._check_estimate_outliers(data)
+        self._stage_lot_history(data)
+        # (the report covers the exported lots, which are the same for both platforms)
+        if self._consignor_report is not None:
+            self._consignor_report.observe(data)
+        # (title/description text is identical for both platforms, so this check only runs here)
+        if self.check_near_duplicates:
+            self._find_near_duplicates(data)
+        # (images & spelling don't depend on the platform either)
+        self._check_images(data)
+        self._check_spelling(data)
+        # (titles & quantities don't depend on the platform either; checked before the lot extensions are
+        #   split off, so warnings are filed under the full lot number)
+        if self.check_title_quantities:
+            self._check_title_quantities(data)
+        progress_callback(23)
+        self._split_lot_ext(data)
+        progress_callback(26)
+        self._convert_numeric_to_int(data)
+        self._add_missing_export_headers(data)
+
+        return True
 
+
+    def _export_liveauctioneers(self, data: list, progress_callback, error_callback):
+        if self._prepare_liveauctioneers(data, progress_callback, error_callback):
+            progress_callback(66)
+            snapshot = self._get_export_snapshot("LiveAuc", self.LA_KEY_FIELDS)
+            with self._open_export(self._get_export_filename("LiveAuc")) as la_file:
+                writer = self._get_export_writer(la_file, self.la_headers)
+                self._write_export_rows(writer, data, self.la_headers, snapshot, self.delta_export)
+            self._finish_export_snapshot(snapshot, "LiveAuc")
         else:
             error_callback("Non-numeric value encountered in a numeric field; export aborted.")
 
 
-    def _export_liveauctioneers(self, data: list, progress_callback, error_callback):
-        filename = "LiveAuc_Export_" + self._get_timestamp() + ".csv"
-        path = os.path.join(self.dest_path, filename)
+    def _prepare_liveauctioneers(self, data: list, progress_callback, error_callback) -> bool:
+        """Runs the LiveAuctioneers processing stages on 'data' (in place).
 
+        Returns:
+            bool: False if a numeric field can't be parsed (export should be aborted). In quarantine
+                mode, failing rows are removed from 'data' instead and True is returned.
+
+        Raises:
+            RuntimeError: If a required column is missing.
+        """
         # verify that required fields are all present
         try:
             self._check_required_columns(data, self.required_headers_la)
@@ -608,37 +1362,311 @@ class CSVProc:
 
         # process data for upload to LiveAuctioneers
         self._uppercase_lotnums(data)
+        self._normalize_numeric_fields(data)
         progress_callback(48)
-        if self._check_numeric_fields(data):
-            self._check_related_columns(data)
-            progress_callback(51)
-            self._process_conditions(data)
-            progress_callback(54)
-            self._process_startbids(data)
-            progress_callback(57)
-            self._format_whitespace(data)
-            progress_callback(60)
-            self._find_errors(data)
-            self._add_missing_export_headers(data)
-            progress_callback(63)
-            # self._check_title_quantities(data)
-
-            # create header row (for ordering purposes)
-            exp_headers = [self.la_headers[h] for h in self.export_file_headers if h in self.la_headers]
+        if self.quarantine_rows:
+            self._quarantine_invalid_rows(data, "LiveAuc")
+            if not data:
+                return True
+        elif not self._check_numeric_fields(data):
+            return False
+
+        self._check_related_columns(data)
+        progress_callback(51)
+        self._process_conditions(data)
+        progress_callback(54)
+        self._process_startbids(data)
+        progress_callback(57)
+        self._repair_text(data)
+        self._format_whitespace(data)
+        progress_callback(60)
+        self._find_errors(data)
+        self._add_missing_export_headers(data)
+        progress_callback(63)
+
+        return True
+
+
+    def _get_export_writer(self, export: ExportParts, header_map: dict) -> ExportParts:
+        """Sets the columns of 'export' & writes the header row (of its first part).
+
+        Must be called after _add_missing_export_headers() (self.export_file_headers sets column order).
+
+        Args:
+            export: the export being written (see _open_export()).
+            header_map: dict mapping [af_headers]: [platform headers] (ex: self.inv_headers).
+        """
+        # create header row (for ordering purposes)
+        exp_headers = [header_map[h] for h in self.export_file_headers if h in header_map]
+
+        export.start(exp_headers)
+        return export
+
+
+    @staticmethod
+    def _write_export_rows(writer: ExportParts, data: list, header_map: dict, snapshot: ExportSnapshot = None,
+                           changed_only: bool = False):
+        """Maps rows of 'data' to platform headers & writes them.
+
+        Args:
+            snapshot: if given, every row is recorded in it.
+            changed_only: only write rows that are new or changed compared to 'snapshot' (delta export).
+        """
+        for line in data:
+            # map AFlex header keys to platform header keys
+            new_line = {header_map[key]: val for (key, val) in line.items() if key in header_map.keys()}
+            changed = snapshot.observe(new_line) if snapshot is not None else True
+            if changed or not changed_only:
+                writer.writerow(new_line)
+
+
+    def _get_export_filename(self, platform: str) -> str:
+        """Returns the export file name for 'platform' (file prefix, ex: "Invalu").
+        """
+        kind = "Delta" if self.delta_export else "Export"
+        return f"{platform}_{kind}_{self._get_timestamp()}.csv"
+
+
+    def _get_outputs(self) -> OutputManifest:
+        """Returns the OutputManifest of self.dest_path, or (if self.zip_outputs) the ZipOutputManifest of
+        this run's archive in it (see _close_outputs()).
+        """
+        if self._outputs is None or self._outputs.directory != self.dest_path:
+            self._close_outputs()
+            if self.zip_outputs:
+                self._outputs = ZipOutputManifest(self.dest_path, f"{self._get_catalog_stem()}_Output_{self._get_timestamp()}.zip")
+            else:
+                self._outputs = OutputManifest(self.dest_path)
+
+        return self._outputs
+
+
+    def _get_catalog_stem(self) -> str:
+        """Returns the catalog's file name without its catalog extension (see CATALOG_EXTENSIONS), ex: "Spring.2026.csv"
+        -> "Spring.2026". A compressed catalog keeps its format in the name ("cat.csv.gz" -> "cat_csv_gz", "cat.zip"
+        -> "cat_zip") so that it never shares an archive name with the plain catalog or the other format.
+        """
+        name = os.path.basename(self.src_path)
+        for ext in sorted(CATALOG_EXTENSIONS, key=len, reverse=True):
+            if name.lower().endswith(ext):
+                stem = name[:-len(ext)]
+                return stem if ext == ".csv" else stem + ext.replace(".", "_")
+
+        return name
+
+
+    def _close_outputs(self):
+        """Finishes this run's outputs (completes the output archive, if any).
+        """
+        if self._outputs is not None:
+            (outputs, self._outputs) = (self._outputs, None)
+            outputs.close()
+
+
+    def _open_output(self, filename: str, *, newline: str = None):
+        """Opens 'filename' in self.dest_path for writing, atomically (see OutputManifest).
+
+        If the file is written with exactly the same content as last time, it is left untouched.
+        """
+        return self._get_outputs().open(filename, newline=newline)
+
+
+    def _open_export(self, filename: str) -> ExportParts:
+        """Opens an export file in self.dest_path, split into part files if self.export_max_rows or
+        self.export_max_bytes is set (see ExportParts). Written atomically, like _open_output().
+        """
+        return ExportParts(self._get_outputs(), filename, max_rows=self.export_max_rows,
+                           max_bytes=self.export_max_bytes)
+
+
+    def _get_snapshot_path(self, platform: str) -> str:
+        """Returns the path of this catalog's export snapshot for 'platform' (kept in self.snapshot_dir, or
+        beside the exports). Snapshots are named after the catalog file, so each auction keeps its own.
+        """
+        directory = self.snapshot_dir or self.dest_path
+        return os.path.join(directory, f".{os.path.basename(self.src_path)}.{platform}.snapshot.json")
+
+
+    def _get_export_snapshot(self, platform: str, key_fields: tuple):
+        """Loads the baseline snapshot of this catalog's exports to 'platform' (delta export only).
+
+        Returns:
+            ExportSnapshot: or None if not doing a delta export.
+        """
+        if not self.delta_export:
+            return None
+        return ExportSnapshot(self._get_snapshot_path(platform), list(key_fields))
 
-            progress_callback(66)
 
-            with open(path, "w", newline="") as la_file:
-                writer = csv.DictWriter(la_file, exp_headers)
-                writer.writeheader()
-                for line in data:
-                    # map AFlex header keys to LA header keys
-                    new_line = {self.la_headers[key]: val for (key, val) in line.items() if key in
-                                self.la_headers.keys()}
-                    writer.writerow(new_line)
+    def accept_export_baselines(self) -> bool:
+        """Makes the snapshots of the last delta export the baseline of the next one (ex: once the delta
+        files have been uploaded). Until then, exporting again compares against the same baseline.
 
+        Returns:
+            bool: Whether there was a pending snapshot to accept.
+        """
+        accepted = [ExportSnapshot.accept(self._get_snapshot_path(platform)) for platform in self.PLATFORM_NAMES]
+        return any(accepted)
+
+
+    def _finish_export_snapshot(self, snapshot: ExportSnapshot, platform: str):
+        """Writes the list of removed lots & saves 'snapshot' as pending (delta export only; see
+        accept_export_baselines()).
+
+        Only called once an export has been written completely, so an aborted export is never saved.
+        """
+        if snapshot is None:
+            return
+
+        # quarantined lots weren't removed from the catalog; keep their last exported version as the baseline
+        for (lot, rejected) in self._rejected_lots.items():
+            if platform in rejected["platforms"]:
+                if platform == "Invalu" and not lot.isdecimal() and lot[:-1].isdecimal():
+                    snapshot.retain(snapshot.key({"Lot Number": lot[:-1], "Lot Ext": lot[-1:]}))
+                else:
+                    snapshot.retain(snapshot.key({"Lot Number": lot, "LotNum": lot}))
+
+        removed = snapshot.removed()
+        filename = f"{platform}_Removed_{self._get_timestamp()}.csv"
+        if removed:
+            with self._open_output(filename, newline="") as removed_file:
+                writer = csv.writer(removed_file)
+                writer.writerow(snapshot.key_fields)
+                writer.writerows(key.split("|") for key in removed)
         else:
+            self._get_outputs().remove(filename)    # (left by an earlier delta that did remove lots)
+
+        snapshot.save()
+
+
+    def _load_store(self, progress_callback) -> CatalogStore:
+        """Streams the catalog file into a temporary CatalogStore, batch by batch.
+
+        Descriptions are concatenated while loading; lot numbers are then normalized with a single
+        SQL statement (and indexed).
+        """
+        if len(self.file_headers) == 0 or len(self.file_headers) != self.file_num_cols:
+            raise RuntimeError("Catalog load error: mismatch in header/column count.")
+
+        store = None
+        profiler = self._new_truncation_profiler()
+        for (rows_read, total_rows, batch) in self._read_batches():
+            for record in batch:
+                profiler.observe(record.get("LotNum", "").upper().strip(), record)
+            self._fix_descriptions(batch)
+            if store is None:
+                store = CatalogStore(list(batch[0].keys()), directory=self.store_directory)
+            store.insert(batch)
+            progress_callback(5 * rows_read / total_rows)
+
+        if store is None:
+            raise RuntimeError("Catalog load error: catalog file is empty.")
+
+        self._check_truncation(profiler)
+
+        if "LotNum" in store.columns:
+            store.execute("UPDATE lots SET LotNum = UPPER(TRIM(LotNum))")
+        store.finish_loading()
+
+        return store
+
+
+    def _export_from_store(self, store: CatalogStore, platform: str, prepare, header_map: dict, key_fields: tuple,
+                           error_callback, progress_callback, progress_range: tuple):
+        """Runs a platform's processing stages over the store one batch at a time, streaming rows to its
+        export file.
+
+        If the export is aborted (non-numeric field) or fails, the partially written file is discarded
+        (an earlier export of the same name is left as it was).
+
+        Args:
+            platform: export file prefix (ex: "Invalu").
+            prepare: the platform's stage runner (ex: self._prepare_invaluable).
+            key_fields: platform columns identifying a lot in export snapshots.
+            progress_range: (start, end) progressbar values spanned by this export.
+        """
+        filename = self._get_export_filename(platform)
+        snapshot = self._get_export_snapshot(platform, key_fields)
+        total_rows = len(store)
+        rows_done = 0
+        aborted = False
+
+        with self._open_export(filename) as export_file:
+            writer = None
+            for batch in store.batches(self.store_batch_size):
+                rows_done += len(batch)
+                if not prepare(batch, lambda *_: None, error_callback):
+                    aborted = True
+                    export_file.discard()
+                    break
+                if batch:   # (empty if every row was quarantined)
+                    if writer is None:
+                        writer = self._get_export_writer(export_file, header_map)
+                    self._write_export_rows(writer, batch, header_map, snapshot, self.delta_export)
+
+                progress_callback(progress_range[0] + (progress_range[1] - progress_range[0]) *
+                                  rows_done / total_rows)
+
+            if writer is None and not aborted:
+                self._get_export_writer(export_file, header_map)
+
+        if aborted:
+            if platform == "Invalu":
+                self._consignor_report = None   # (gathered in this pass, so incomplete)
             error_callback("Non-numeric value encountered in a numeric field; export aborted.")
+        else:
+            self._finish_export_snapshot(snapshot, platform)
+
+
+    def _process_from_store(self, *, progress_callback, result_callback):
+        """Out-of-core version of run(): rows are staged in a temporary SQLite database and each
+        platform export is a batched pass over it, so memory use doesn't grow with catalog size.
+        """
+        self._store = self._load_store(progress_callback)
+        self._consignor_report = self._new_consignor_report()
+
+        try:
+            self._check_estimate_outliers(dict(zip(("LotNum", "LoEst", "HiEst", "Reserve"), row)) for row in
+                                          self._store.execute(self._estimate_query(self._store.columns)))
+            # (near duplicates are only looked for in the Invaluable pass; see _prepare_invaluable())
+            self._reset_near_duplicates()
+            self._export_from_store(self._store, "Invalu", self._prepare_invaluable, self.inv_headers,
+                                    self.INV_KEY_FIELDS, result_callback, progress_callback, (5, 45))
+            self._export_from_store(self._store, "LiveAuc", self._prepare_liveauctioneers, self.la_headers,
+                                    self.LA_KEY_FIELDS, result_callback, progress_callback, (45, 90))
+            self._finish_run(progress_callback, result_callback)
+        except RuntimeError:
+            progress_callback(0.0)
+        except ValueError as e:
+            result_callback(f"Export error: {e}")
+            progress_callback(0.0)
+        finally:
+            self._close_lot_history()
+            self._close_outputs()
+            self._store.close()
+            self._store = None
+
+
+    @staticmethod
+    def _estimate_query(columns: list) -> str:
+        """Returns an SQL query of (LotNum, LoEst, HiEst, Reserve) for every lot in a CatalogStore with 'columns'.
+        """
+        if not {"LotNum", "LoEst", "HiEst"} <= set(columns):
+            return "SELECT NULL, NULL, NULL, NULL WHERE 0"
+        return f"SELECT LotNum, LoEst, HiEst, {'Reserve' if 'Reserve' in columns else 'NULL'} FROM lots"
+
+
+    def _get_consignors(self) -> dict:
+        """Returns {lot number: consignor number} for every lot (empty if there is no Consign# column).
+        """
+        if "Consign#" not in self.file_headers:
+            return {}
+
+        if self._store is not None:
+            return {lot: (consignor or "").strip() for (lot, consignor) in
+                    self._store.execute('SELECT LotNum, "Consign#" FROM lots')}
+
+        return {record["LotNum"].upper().strip(): record["Consign#"].strip() for record in self.data}
 
 
     @staticmethod
@@ -646,16 +1674,185 @@ class CSVProc:
         return datetime.datetime.now().strftime("%m_%d_%Y")
 
 
+    def validate(self, *, fail_fast: bool = False) -> dict:
+        """Checks the catalog without transforming or exporting it (no output files are created).
+
+        Runs in a new session (see session() & run_validation()).
+        """
+        session = self.session()
+        warnings = session.run_validation(fail_fast=fail_fast)
+        self._spell_checker = session._spell_checker    # (keep the loaded word list for later runs)
+
+        return warnings
+
+
+    def run_validation(self, *, fail_fast: bool = False, batches=None) -> dict:
+        """Checks the catalog without transforming or exporting it (no output files are created).
+
+        Makes one read-only pass over the catalog, batch by batch, running the required column,
+        numeric, co-requisite column, text and lot number checks. Each batch of rows is normalized in
+        memory (lot number case, whitespace, calculated StartBids) only so that the checks see the same
+        values an export would.
+
+        Args:
+            fail_fast: stop at the first fatal error (one that would abort an export) by raising it.
+            batches: (rows read, total rows, batch of row dicts) to check instead of the catalog's
+                rows (see _read_batches(); ex: a sample of the catalog, see ValidationPreview).
+
+        Returns:
+            dict: lot number -> list of warnings (the same form as self.lot_warnings).
+
+        Raises:
+            RuntimeError: If fail_fast and a required column is missing.
+            ValueError: If fail_fast and a lot has a non-numeric numeric field or an invalid lot number.
+        """
+        if len(self.file_headers) == 0 or len(self.file_headers) != self.file_num_cols:
+            raise RuntimeError("Catalog load error: mismatch in header/column count.")
+
+        self.lot_warnings = {}
+        self.warning_records = []
+        self._reset_near_duplicates()
+        self._image_manifest = None
+        self._constraints = None
+
+        profiler = self._new_truncation_profiler()
+        estimates = []  # (estimate outliers are relative to the whole catalog; see _check_estimate_outliers())
+        for (rows_read, _, batch) in (self._read_batches() if batches is None else batches):
+            for record in batch:
+                profiler.observe(record.get("LotNum", "").upper().strip(), record)
+            self._fix_descriptions(batch)
+
+            if rows_read == len(batch):     # (first batch)
+                for header in dict.fromkeys(self.required_headers_inv + self.required_headers_la):
+                    try:
+                        self._check_required_columns(batch[:1], [header])
+                    except RuntimeError as e:
+                        self._add_lot_warning("0", str(e), code=WARN.MISSING_COLUMN, field=header)
+                        if fail_fast:
+                            raise
+
+            self._uppercase_lotnums(batch)
+            self._normalize_numeric_fields(batch)
+            self._check_constraints(batch)
+            self._repair_text(batch)
+            self._format_whitespace(batch)
+
+            # text checks need parsable numbers; skip (already warned about) non-numeric lots
+            numeric = []
+            for record in batch:
+                if self._record_is_numeric(record):
+                    numeric.append(record)
+                elif fail_fast:
+                    raise ValueError(f"Non-numeric value in a numeric field of lot {record['LotNum']}.")
+
+                if not self._check_lot_number(record["LotNum"]) and fail_fast:
+                    raise ValueError(f"Unexpected alpha character(s) in lot {record['LotNum']}.")
+
+            self._check_images(batch)
+
+            if not numeric:
+                continue
+
+            self._check_related_columns(numeric)
+            # (as in an export, so a boilerplate condition replaces the text before it's checked)
+            self._process_conditions(numeric)
+            # (calculated StartBids affect the estimate checks in _find_errors())
+            self._process_startbids(numeric)
+            estimates.extend({field: record.get(field) for field in ("LotNum", "LoEst", "HiEst", "Reserve")}
+                             for record in numeric)
+            try:
+                self._find_errors(numeric)
+                self._stage_lot_history(numeric, read_only=True)
+                if self.check_near_duplicates:
+                    self._find_near_duplicates(numeric)
+                self._check_spelling(numeric)
+                if self.check_title_quantities:
+                    self._check_title_quantities(numeric)
+            except KeyError:
+                pass    # missing required column; reported above
+
+        self._check_truncation(profiler, save_profile=False)
+        self._check_estimate_outliers(estimates)
+        self._check_lot_history(save=False)
+
+        return self.lot_warnings
+
+
+    def _finish_run(self, progress_callback, result_callback):
+        """Post-export steps shared by run() & _process_from_store().
+        """
+        # compare this catalog's lots with their previous offerings, then add them to the lot history
+        self._check_lot_history()
+
+        # remember this catalog's lots for near-duplicate checks of future catalogs (the detector of the
+        #   Invaluable pass holds them all; see _find_near_duplicates())
+        if self.check_near_duplicates and self.duplicate_index_path and self._duplicate_detectors is not None:
+            (detector, past_catalogs) = self._duplicate_detectors
+            if past_catalogs is not None:
+                past_catalogs.close()
+            try:
+                detector.save(self.duplicate_index_path, self._get_auction_id())
+            except sqlite3.Error as e:
+                raise ValueError(f"Unable to update duplicate index {self.duplicate_index_path} ({e}).")
+
+        if self._rejected_lots:
+            self._write_rejected_lots()
+            result_callback(f"{len(self._rejected_lots)} lots left out of the export(s); check rejected lots file")
+
+        if self._consignor_report is not None:
+            self._write_consignor_reports()
+
+        # generate warning log as necessary
+        num_warnings = self.count_warnings()
+        if num_warnings > 0:
+            self._generate_warning_log()
+            self._generate_warning_records()
+            result_callback(f"{num_warnings} warnings generated; check log file")
+
+        # setting progressbar value to 99+ makes it appear full (whereas 100 looks empty)
+        progress_callback(99.99)
+
+
     def process(self, *, progress_callback, result_callback):
         """Coordinates LA & Inv. catalog processing+export and warning log creation.
 
+        Each call runs in a new session (see session() & run()), so warnings and data never carry over
+        from one call to the next.
+
         Args:
             progress_callback: func. with int param for updating progressbar in MainWindow
             result_callback: func. with str param for displaying message to user after processing/export is done.
         """
+        session = self.session()
+        session.run(progress_callback=progress_callback, result_callback=result_callback)
+        self._spell_checker = session._spell_checker    # (keep the loaded word list for later runs)
+
+
+    def run(self, *, progress_callback, result_callback):
+        """Processes & exports the catalog using this instance's state (normally a fresh session; see process()).
+
+        Args:
+            progress_callback: func. with int param for updating progressbar in MainWindow
+            result_callback: func. with str param for displaying message to user after processing/export is done.
+        """
+        self._image_manifest = None     # pick up images added since the last run
+        self._rejected_lots = {}
+        self._constraints = None
+        self._consignor_report = None
+
+        if self.use_disk_store:
+            self._process_from_store(progress_callback=progress_callback, result_callback=result_callback)
+            return
+
         # load data from the catalog .csv file into self.data
         self._load_af_csv()
         progress_callback(0.0)
+        self._consignor_report = self._new_consignor_report()
+
+        profiler = self._new_truncation_profiler()
+        for record in self.data:
+            profiler.observe(record.get("LotNum", "").upper().strip(), record)
+        self._check_truncation(profiler)
 
         self._fix_descriptions()
         progress_callback(2.5)    # set progress bar to 2.5%
@@ -670,17 +1867,12 @@ class CSVProc:
             progress_callback(45)
             self._export_liveauctioneers(la_data, progress_callback, result_callback)
             progress_callback(90)
-
-            # generate warning log as necessary
-            num_warnings = self.count_warnings()
-            if num_warnings > 0:
-                self._generate_warning_log()
-                result_callback(f"{num_warnings} warnings generated; check log file")
-
-            # setting progressbar value to 99+ makes it appear full (whereas 100 looks empty)
-            progress_callback(99.99)
+            self._finish_run(progress_callback, result_callback)
         except RuntimeError:
             progress_callback(0.0)
         except ValueError as e:
             result_callback(f"Export error: {e}")
             progress_callback(0.0)
+        finally:
+            self._close_lot_history()
+            self._close_outputs()
@@ -0,0 +1,324 @@
+# CatalogIndex.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import errno
+import gzip
+import io
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+
+
+# a row break, or a quote opening a quoted field (right after a field separator; see CatalogIndex._build_index())
+_ROW_BREAK_OR_QUOTED_FIELD = re.compile(rb'\r\n?|\n|(?<=,)"')
+
+# catalogs smaller than this (in rows) are parsed in-process; worker startup costs more than it saves
+PARALLEL_ROW_THRESHOLD = 20000
+
+# compressed catalogs are decompressed this many bytes at a time
+DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+
+# file name endings of the catalog files that can be read (compressed ones are decompressed as they're read)
+CATALOG_EXTENSIONS = (".csv", ".csv.gz", ".zip")
+
+# indexes shared by every user of a file (see open_catalog()), most recently used last
+_open_indexes = {}  # real path -> CatalogIndex
+_open_indexes_lock = threading.Lock()
+
+# indexes kept in _open_indexes (the catalog in use & a few recently selected or merged ones)
+OPEN_INDEX_LIMIT = 8
+
+
+def open_catalog(src_path: str) -> "CatalogIndex":
+    """Returns the shared CatalogIndex of 'src_path', building it only if the file is new or has changed
+    on disk (in size or modification time) since it was indexed.
+
+    The file is then indexed once however often it's used (ex: checked when selected, previewed in the
+    settings window, validated & processed, in any number of sessions). Indexes hold no handle on
+    their file (see CatalogIndex), so a shared one never stops the file from being saved over; only
+    the OPEN_INDEX_LIMIT most recently used are kept. An index replaced because its file changed, or
+    dropped to make room, isn't closed, since sessions started earlier may still hold it.
+
+    Raises:
+        OSError: If the file can't be opened.
+    """
+    path = os.path.realpath(src_path)
+    with _open_indexes_lock:
+        index = _open_indexes.pop(path, None)
+        if index is None or not index.is_current():
+            index = CatalogIndex(src_path)
+        _open_indexes[path] = index
+        while len(_open_indexes) > OPEN_INDEX_LIMIT:
+            del _open_indexes[next(iter(_open_indexes))]
+
+        return index
+
+
+def is_catalog_file(path: str) -> bool:
+    """Whether 'path' names a catalog file that can be read (see CATALOG_EXTENSIONS).
+    """
+    return path.lower().endswith(CATALOG_EXTENSIONS)
+
+
+def _decompress(src_file, src_path: str):
+    """Decompresses the catalog inside a compressed file (the content of a .gz file, or the (first) .csv
+    file in a .zip archive) into a temporary file, which is returned. The data is copied over in chunks
+    of DECOMPRESS_CHUNK_SIZE bytes, so the decompressed catalog is never held in memory; the temporary
+    file is deleted when it's closed.
+
+    Raises:
+        OSError: If the file isn't a valid archive, or a .zip archive holds no .csv file.
+    """
+    spool = tempfile.TemporaryFile(prefix="af_csv_proc_")
+    try:
+        if src_path.lower().endswith(".gz"):
+            try:
+                with gzip.GzipFile(fileobj=src_file) as gz_file:
+                    shutil.copyfileobj(gz_file, spool, DECOMPRESS_CHUNK_SIZE)
+            except (EOFError, zlib.error):    # (a bad header raises gzip.BadGzipFile, an OSError, already)
+                raise OSError(errno.EINVAL, "damaged or incomplete .gz file", src_path) from None
+        else:
+            try:
+                with zipfile.ZipFile(src_file) as archive:
+                    names = [name for name in archive.namelist() if name.lower().endswith(".csv")]
+                    if not names:
+                        raise OSError(errno.EINVAL, "no .csv file in the archive", src_path)
+                    with archive.open(names[0]) as member:
+                        shutil.copyfileobj(member, spool, DECOMPRESS_CHUNK_SIZE)
+            except zipfile.BadZipFile:
+                raise OSError(errno.EINVAL, "not a valid .zip archive", src_path) from None
+        spool.flush()
+    except BaseException:
+        spool.close()
+        raise
+
+    return spool
+
+
+def _parse_chunk(chunk: bytes, fieldnames: list) -> list:
+    text = io.StringIO(chunk.decode("latin-1"), newline="")
+    if fieldnames is None:
+        return [row for row in csv.reader(text)]
+    return [row for row in csv.DictReader(text, fieldnames=fieldnames)]
+
+
+class CatalogIndex:
+    """Byte-offset index of the row boundaries of a catalog .csv file.
+
+    The index is built in a single scan of the memory-mapped file. Newlines that fall inside a quoted
+    field (AuctionFlex keeps line breaks typed into descriptions) are not treated as row boundaries.
+    Once built, any row or range of rows can be decoded directly without reading from the start
+    of the file, and row ranges can be handed to worker processes for parallel parsing. Use
+    open_catalog() to share one index per file.
+
+    The file & its mapping are closed once the index is built; each read reopens the file and seeks
+    straight to its rows, so the catalog can be saved over (ex: re-exported from AuctionFlex, which on
+    Windows fails while another program has the file open) and is then simply indexed again.
+
+    Compressed catalogs (.csv.gz, or a .csv file in a .zip archive) are decompressed once, in chunks,
+    to a temporary file that is indexed the same way and kept (open) for reads until close().
+    """
+
+    def __init__(self, src_path: str):
+        self.src_path = src_path
+        self._spool = None  # decompressed copy of a compressed catalog
+        self._spool_lock = threading.Lock()     # (reads of the spool seek, so they can't overlap)
+        self._closed = False
+
+        with open(src_path, "rb") as src_file:
+            stat = os.fstat(src_file.fileno())
+            self._size = stat.st_size
+            self._mtime = stat.st_mtime_ns
+
+            data_file = src_file
+            if src_path.lower().endswith((".gz", ".zip")):
+                data_file = self._spool = _decompress(src_file, src_path)
+
+            # offsets[i] is the first byte of row i; offsets[-1] is the end of the last row
+            # (mmap() refuses zero-length files)
+            if os.fstat(data_file.fileno()).st_size:
+                with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    self.offsets = self._build_index(buf)
+            else:
+                self.offsets = self._build_index(b"")
+
+
+    @staticmethod
+    def _build_index(buf) -> array:
+        """Scans 'buf' once, recording the byte offset at which each row starts.
+
+        Rows are split the way csv.reader splits them: a quote only opens a quoted field at the start
+        of a field (ex: the quote in 12" tall is just a character), line breaks inside a quoted field
+        don't end the row, and "\r\n", "\n" or a bare "\r" do otherwise. Escaped quotes ("") inside a
+        quoted field are skipped over.
+
+        Returns:
+            array: row start offsets followed by the offset of the end of the final row.
+        """
+        offsets = array("q", [0])
+        size = len(buf)
+        pos = 0
+
+        while pos < size:
+            # (pos is at the start of a field)
+            if buf[pos:pos + 1] == b'"':
+                # quoted field: skip to its closing quote
+                close_quote = buf.find(b'"', pos + 1)
+                while close_quote != -1 and buf[close_quote + 1:close_quote + 2] == b'"':
+                    close_quote = buf.find(b'"', close_quote + 2)
+                if close_quote == -1:
+                    break
+                pos = close_quote + 1
+
+            # the rest of the field (& any unquoted fields after it) runs to a row break or a quoted field
+            match = _ROW_BREAK_OR_QUOTED_FIELD.search(buf, pos)
+            if match is None:
+                break
+            if match[0] == b'"':
+                pos = match.start()
+            else:
+                pos = match.end()
+                offsets.append(pos)
+
+        # an unterminated quote at EOF still has to end the last row
+        if offsets[-1] != size:
+            offsets.append(size)
+
+        # drop a trailing "row" made up only of whitespace (ex: final blank line)
+        while len(offsets) > 1 and not bytes(buf[offsets[-2]:offsets[-1]]).strip():
+            offsets.pop()
+
+        return offsets
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def is_current(self) -> bool:
+        """Whether the file on disk is still the one indexed (same size & modification time).
+        """
+        if self._closed:
+            return False
+        try:
+            stat = os.stat(self.src_path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (self._size, self._mtime)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+        self._closed = True
+
+
+    def row_bytes(self, start: int, stop: int) -> bytes:
+        """Returns the raw bytes of rows [start, stop).
+
+        Raises:
+            OSError: If the file can't be read, or has changed since it was indexed.
+        """
+        stop = min(stop, len(self))
+        if start >= stop:
+            return b""
+        (begin, end) = (self.offsets[start], self.offsets[stop])
+
+        if self._spool is not None:
+            with self._spool_lock:
+                self._spool.seek(begin)
+                return self._spool.read(end - begin)
+
+        with open(self.src_path, "rb") as src_file:
+            stat = os.fstat(src_file.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != (self._size, self._mtime):
+                raise OSError(errno.ESTALE, "catalog file changed since it was indexed", self.src_path)
+            src_file.seek(begin)
+            return src_file.read(end - begin)
+
+
+    def rows(self, start: int = 0, stop: int = None, fieldnames: list = None) -> list:
+        """Decodes rows [start, stop) as lists (or as dicts keyed by 'fieldnames').
+        """
+        if stop is None:
+            stop = len(self)
+        return _parse_chunk(self.row_bytes(start, stop), fieldnames)
+
+
+    def row(self, i: int, fieldnames: list = None):
+        """Decodes a single row (seeks directly to it).
+
+        Raises:
+            IndexError: If 'i' is outside the catalog.
+        """
+        if not 0 <= i < len(self):
+            raise IndexError(f"Row {i} out of range (catalog has {len(self)} rows).")
+        return self.rows(i, i + 1, fieldnames)[0]
+
+
+    def ranges(self, n_chunks: int) -> list:
+        """Splits the catalog into at most 'n_chunks' contiguous (start, stop) row ranges.
+        """
+        total = len(self)
+        if total == 0:
+            return []
+        n_chunks = max(1, min(n_chunks, total))
+        step = -(-total // n_chunks)
+        return [(i, min(i + step, total)) for i in range(0, total, step)]
+
+
+    def read_all(self, fieldnames: list = None, *, workers: int = None) -> list:
+        """Parses every row of the catalog, using worker processes for large files.
+
+        Args:
+            fieldnames: column headers; rows are returned as dicts if given, lists otherwise.
+            workers: number of worker processes (defaults to os.cpu_count()). 1 disables parallelism.
+
+        Returns:
+            list: all rows, in file order.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(self) < PARALLEL_ROW_THRESHOLD:
+            return self.rows(0, len(self), fieldnames)
+
+        # (workers get their rows' bytes from the mapped file rather than reading the file again)
+        chunk_ranges = self.ranges(workers * 4)
+        data = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_chunk, self.row_bytes(start, stop), fieldnames)
+                       for (start, stop) in chunk_ranges]
+            for future in futures:
+                data.extend(future.result())
+
+        return data
@@ -0,0 +1,124 @@
+# CatalogMerge.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import re
+
+
+# a lot number: digits, optionally followed by an alpha extension (ex: 205, 205A)
+LOT_RE = re.compile(r"(\d+)([A-Z]*)")
+
+
+def lot_sort_key(lot: str) -> tuple:
+    """Returns a key ordering lot numbers by numeric value, with alpha-extended lots right after their
+    base lot (ex: 9, 10, 205, 205A, 205B, 206). Anything else (ex: a lot number with a typo) sorts first,
+    alphabetically.
+    """
+    lot = lot.strip().upper()
+    match = LOT_RE.fullmatch(lot)
+    if match:
+        return (1, int(match[1]), match[2])
+    return (0, 0, lot)
+
+
+class CatalogMerger:
+    """Streams the rows of several catalog files (ex: the sessions of a multi-day sale) merged in lot order.
+
+    Each file must already be in lot order (as AuctionFlex exports are); the merge reads every file
+    one batch at a time and keeps a single row per file in a heap, so the merged catalog is never held
+    in memory (or written out) as a whole. As rows go by, the merger records lot numbers found in more
+    than one file and rows out of lot order within a file. Optionally, every lot is renumbered
+    consecutively in merged order instead, which resolves collisions (alpha extensions are kept:
+    205, 205A, 206 -> 1, 1A, 2).
+    """
+
+    def __init__(self, sources: list, fieldnames: list, *, batch_size: int = 5000, renumber: bool = False):
+        """
+        Args:
+            sources: (name, CatalogIndex) of each file, in session order (equal lot numbers are merged
+                in this order).
+            fieldnames: the column mapping shared by every file.
+            renumber: give lots consecutive new numbers in merged order.
+        """
+        self.sources = sources
+        self.fieldnames = fieldnames
+        self.batch_size = batch_size
+        self.renumber = renumber
+
+        self.collisions = {}    # lot number -> names of the files it was found in (none when renumbering)
+        self.out_of_order = []  # (file name, lot, lot it follows) for rows out of lot order (original numbers)
+
+
+    def __len__(self):
+        return sum(len(index) for (_, index) in self.sources)
+
+
+    def _source_rows(self, source: int):
+        """Yields (sort key, source number, row) for one file's rows, read a batch at a time.
+        """
+        (name, index) = self.sources[source]
+        previous = None
+        for (start, stop) in index.ranges(-(-len(index) // self.batch_size)):
+            for row in index.rows(start, stop, self.fieldnames):
+                key = lot_sort_key(row.get("LotNum") or "")
+                if previous is not None and key < previous[0]:
+                    self.out_of_order.append((name, row["LotNum"].strip(), previous[1]))
+                previous = (key, row["LotNum"].strip())
+                yield (key, source, row)
+
+
+    def rows(self):
+        """Yields every file's rows (dicts keyed by fieldnames), merged in lot order.
+        """
+        streams = [self._source_rows(source) for source in range(len(self.sources))]
+        (last_key, last_source) = (None, None)
+        new_numbers = {}    # (source, original base lot number) -> new number (when renumbering)
+
+        # (when renumbering, equal base lots are taken a file at a time so that alpha lots stay with their base)
+        if self.renumber:
+            merge_key = lambda item: (item[0][0], item[0][1], item[1], item[0][2])
+        else:
+            merge_key = lambda item: item[0]
+
+        for (key, source, row) in heapq.merge(*streams, key=merge_key):
+            if key == last_key and source != last_source and key[0] and not self.renumber:
+                lot = row["LotNum"].strip().upper()
+                names = self.collisions.setdefault(lot, [self.sources[last_source][0]])
+                if self.sources[source][0] not in names:
+                    names.append(self.sources[source][0])
+            (last_key, last_source) = (key, source)
+
+            if self.renumber and key[0]:
+                # (an alpha lot follows its own file's base lot, even if another file's lot came in between)
+                number = new_numbers.setdefault((source, key[1]), len(new_numbers) + 1)
+                row["LotNum"] = f"{number}{key[2]}"
+
+            yield row
+
+
+    def batches(self, batch_size: int = None):
+        """Yields the merged rows as lists of at most 'batch_size' dicts (self.batch_size by default).
+        """
+        batch_size = batch_size or self.batch_size
+        batch = []
+        for row in self.rows():
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
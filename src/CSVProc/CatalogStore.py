@@ -0,0 +1,110 @@
+# CatalogStore.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import sqlite3
+import tempfile
+
+
+class CatalogStore:
+    """Temporary SQLite database holding catalog rows, for catalogs too large to keep in memory.
+
+    Rows are stored one column per catalog field (in file order) and read back in batches of dicts,
+    so only one batch is ever held in memory at a time. The database file is deleted on close().
+    """
+
+    def __init__(self, columns: list, *, directory: str = None):
+        # duplicate headers (ex: several "[Ignore]" columns) collapse into one, as they do in csv.DictReader
+        self.columns = list(dict.fromkeys(columns))
+
+        fd, self.path = tempfile.mkstemp(suffix=".db", prefix="af_csv_proc_", dir=directory)
+        os.close(fd)
+
+        self._db = sqlite3.connect(self.path)
+        # the database is throwaway; skip the journal & fsyncs
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute(f"CREATE TABLE lots (row_id INTEGER PRIMARY KEY, "
+                         f"{', '.join(self._quote(c) + ' TEXT' for c in self.columns)})")
+        self._column_list = ", ".join(self._quote(c) for c in self.columns)
+
+
+    @staticmethod
+    def _quote(column: str) -> str:
+        return '"' + column.replace('"', '""') + '"'
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM lots").fetchone()[0]
+
+
+    def insert(self, rows: list):
+        """Appends 'rows' (dicts keyed by column) to the store.
+        """
+        self._db.executemany(f"INSERT INTO lots ({self._column_list}) VALUES ({', '.join('?' * len(self.columns))})",
+                             ([row.get(c) for c in self.columns] for row in rows))
+
+
+    def finish_loading(self):
+        """Commits loaded rows and builds the lot number index (faster once than on every insert).
+        """
+        if "LotNum" in self.columns:
+            self._db.execute("CREATE INDEX lots_lotnum ON lots (LotNum)")
+        self._db.commit()
+
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The store's database connection (other stages may keep their own tables in it).
+        """
+        return self._db
+
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Runs 'sql' directly against the 'lots' table (for checks and fixes expressible in SQL).
+        """
+        return self._db.execute(sql, params)
+
+
+    def batches(self, batch_size: int):
+        """Yields the stored rows, in file order, as lists of at most 'batch_size' dicts.
+
+        Every call returns freshly built dicts, so batches can be modified freely without affecting
+        the store or later passes.
+        """
+        cursor = self._db.execute(f"SELECT {self._column_list} FROM lots ORDER BY row_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [dict(zip(self.columns, row)) for row in rows]
+
+
+    def close(self):
+        self._db.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
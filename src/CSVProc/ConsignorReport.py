@@ -0,0 +1,194 @@
+# ConsignorReport.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import sqlite3
+
+from src.CSVProc.CatalogMerge import lot_sort_key
+
+
+# columns of a consignor's lot list (catalog columns the catalog lacks are left blank)
+LOT_COLUMNS = ("LotNum", "Ref#", "Title", "LoEst", "HiEst", "StartBid", "Reserve")
+
+# columns of the catalog summary
+SUMMARY_COLUMNS = ("Consignor", "Lots", "LoEst Total", "HiEst Total", "Reserve Total", "Lots With Reserve",
+                   "Reserve Coverage", "Warnings")
+
+
+def _amount(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _Totals:
+    __slots__ = ("lots", "lo_est", "hi_est", "reserve", "reserved_lots", "warnings")
+
+    def __init__(self):
+        self.lots = 0
+        self.lo_est = 0.0
+        self.hi_est = 0.0
+        self.reserve = 0.0
+        self.reserved_lots = 0
+        self.warnings = 0
+
+
+class ConsignorReport:
+    """Catalog totals grouped by consignor (Consign#), gathered from processed rows as they're exported.
+
+    observe() is called with each batch of rows going through the export stages, so the totals (lot
+    count, estimate & reserve sums, lots with a reserve) are kept as running aggregates and the
+    catalog is never read again for them. Warnings are counted per consignor when the summary is
+    written, from the run's warning records. Each consignor's lot list (a few columns per lot) is
+    kept too, if asked for.
+
+    Given a database connection (ex: a CatalogStore's), each lot's consignor & lot list row are kept
+    in it rather than in memory, so memory use doesn't grow with catalog size.
+    """
+
+    def __init__(self, *, keep_lots: bool = True, db: sqlite3.Connection = None):
+        """
+        Args:
+            keep_lots: keep each consignor's lots for write_lots() (otherwise only totals are kept).
+            db: connection to keep the per-lot data in (tables named report_*); in memory if None.
+        """
+        self.keep_lots = keep_lots
+        self.totals = {}        # consignor ("" = none) -> _Totals
+        self.lots = {}          # consignor -> [lot list rows] (if keep_lots & no db)
+        self.consignors = {}    # lot number -> consignor (if no db)
+
+        self._db = db
+        if db is not None:
+            db.execute("DROP TABLE IF EXISTS report_lots")
+            db.execute(f"CREATE TABLE report_lots (lot TEXT, consignor TEXT, sort_rank INTEGER, sort_num INTEGER, "
+                       f"sort_ext TEXT, {', '.join(f'col{i} TEXT' for i in range(len(LOT_COLUMNS)))})")
+            db.execute("CREATE INDEX report_lots_lot ON report_lots (lot)")
+            db.execute("CREATE INDEX report_lots_consignor ON report_lots (consignor, sort_rank, sort_num, sort_ext)")
+
+
+    def observe(self, records: list):
+        """Adds processed catalog rows (dicts with uppercased "LotNum"s, before lot extensions are split off).
+        """
+        db_rows = []
+        for record in records:
+            consignor = (record.get("Consign#") or "").strip()
+
+            totals = self.totals.get(consignor)
+            if totals is None:
+                totals = self.totals[consignor] = _Totals()
+            reserve = _amount(record.get("Reserve"))
+            totals.lots += 1
+            totals.lo_est += _amount(record.get("LoEst"))
+            totals.hi_est += _amount(record.get("HiEst"))
+            totals.reserve += reserve
+            totals.reserved_lots += reserve > 0
+
+            lot_list_row = [record.get(column, "") for column in LOT_COLUMNS] if self.keep_lots and consignor else None
+            if self._db is not None:
+                db_rows.append((record["LotNum"], consignor, *lot_sort_key(record["LotNum"]),
+                                *(lot_list_row or [None] * len(LOT_COLUMNS))))
+                continue
+
+            self.consignors[record["LotNum"]] = consignor
+            if lot_list_row:
+                self.lots.setdefault(consignor, []).append(lot_list_row)
+
+        if db_rows:
+            self._db.executemany(f"INSERT INTO report_lots VALUES ({', '.join('?' * (5 + len(LOT_COLUMNS)))})",
+                                 db_rows)
+
+
+    def summary_rows(self, warning_records: list) -> list:
+        """Returns a summary row (dict keyed by SUMMARY_COLUMNS) per consignor, then one for the whole catalog.
+
+        Args:
+            warning_records: the run's warnings (see CSVProc.warning_records); each is counted for the
+                consignor of its lot.
+        """
+        for totals in self.totals.values():
+            totals.warnings = 0
+        for warning in warning_records:
+            consignor = self._consignor_of(warning["lot"])
+            if consignor is not None:
+                self.totals[consignor].warnings += 1
+
+        catalog = _Totals()
+        rows = []
+        for consignor in sorted(self.totals, key=lot_sort_key):
+            totals = self.totals[consignor]
+            for name in _Totals.__slots__:
+                setattr(catalog, name, getattr(catalog, name) + getattr(totals, name))
+            rows.append(self._summary_row(consignor or "(none)", totals))
+
+        # (a catalog without consignors only gets its total)
+        if list(self.totals) == [""]:
+            rows = []
+        rows.append(self._summary_row("Total", catalog))
+
+        return rows
+
+
+    def _consignor_of(self, lot: str):
+        """Returns the consignor of observed lot 'lot' (None if it wasn't observed).
+        """
+        if self._db is None:
+            return self.consignors.get(lot)
+
+        row = self._db.execute("SELECT consignor FROM report_lots WHERE lot = ? ORDER BY rowid DESC LIMIT 1",
+                               (lot,)).fetchone()
+        return row[0] if row else None
+
+
+    def lot_list_consignors(self) -> list:
+        """Returns the consignors with a lot list to write (see write_lots()), in consignor order.
+        """
+        if not self.keep_lots:
+            return []
+
+        return sorted((consignor for consignor in self.totals if consignor), key=lot_sort_key)
+
+
+    @staticmethod
+    def _summary_row(name: str, totals: _Totals) -> dict:
+        coverage = totals.reserved_lots / totals.lots if totals.lots else 0
+        return dict(zip(SUMMARY_COLUMNS, (name, totals.lots, f"{totals.lo_est:.2f}", f"{totals.hi_est:.2f}",
+                                          f"{totals.reserve:.2f}", totals.reserved_lots, f"{coverage:.0%}",
+                                          totals.warnings)))
+
+
+    def write_summary(self, summary_file, warning_records: list):
+        """Writes the summary rows (see summary_rows()) as CSV to 'summary_file' (a writable text file).
+        """
+        writer = csv.DictWriter(summary_file, SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.summary_rows(warning_records))
+
+
+    def write_lots(self, lots_file, consignor: str):
+        """Writes a consignor's lots, in lot order, as CSV to 'lots_file' (a writable text file).
+        """
+        writer = csv.writer(lots_file)
+        writer.writerow(LOT_COLUMNS)
+        if self._db is None:
+            writer.writerows(sorted(self.lots.get(consignor, []), key=lambda row: lot_sort_key(row[0])))
+            return
+
+        # (streamed from the database in lot order, so the list is never held in memory)
+        writer.writerows(self._db.execute(
+            f"SELECT {', '.join(f'col{i}' for i in range(len(LOT_COLUMNS)))} FROM report_lots "
+            f"WHERE consignor = ? ORDER BY sort_rank, sort_num, sort_ext, rowid", (consignor,)))
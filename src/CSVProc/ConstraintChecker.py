@@ -0,0 +1,88 @@
+# ConstraintChecker.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+class ConstraintChecker:
+    """Checks catalog-wide rules between key columns in a single pass over the rows.
+
+    Two kinds of rules are supported:
+      - unique keys: no two lots may share the same values of a group of columns (ex: Consign# + Ref#).
+      - dependencies: lots that agree on one group of columns must agree on another (ex: Ref# -> Consign#,
+        i.e. a reference number always belongs to the same consignor).
+
+    Each rule keeps a hash index of the distinct keys seen so far (with the first lot that used each
+    one), so rows are checked as they're observed, batch by batch, in O(1) each. Rows with a blank
+    value in a rule's columns are skipped by that rule.
+    """
+
+    def __init__(self, unique_keys=(), dependencies=()):
+        """
+        Args:
+            unique_keys: column groups (ex: [("Consign#", "Ref#")]).
+            dependencies: (determinant columns, dependent columns) pairs (ex: [(("Ref#",), ("Consign#",))]).
+        """
+        self.unique_keys = [tuple(fields) for fields in unique_keys]
+        self.dependencies = [(tuple(determinant), tuple(dependent)) for (determinant, dependent) in dependencies]
+
+        self._unique_index = [{} for _ in self.unique_keys]     # key values -> first lot
+        self._dependency_index = [{} for _ in self.dependencies]    # determinant values -> (dependent values, lot)
+
+
+    @staticmethod
+    def _values(row: dict, fields: tuple):
+        """Returns the stripped values of 'fields' in 'row', or None if any is blank.
+        """
+        values = tuple((row.get(field) or "").strip() for field in fields)
+        return values if all(values) else None
+
+
+    @staticmethod
+    def _describe(fields: tuple, values: tuple) -> str:
+        return f"{'/'.join(fields)} {'/'.join(values)}"
+
+
+    def observe(self, lot: str, row: dict) -> list:
+        """Checks one row against every rule (and the rows observed before it).
+
+        Returns:
+            list: ("unique" or "dependency", field, message) for each rule the row breaks; the message
+                names the earlier lot it conflicts with.
+        """
+        violations = []
+
+        for (fields, index) in zip(self.unique_keys, self._unique_index):
+            key = self._values(row, fields)
+            if key is None:
+                continue
+            if key in index:
+                violations.append(("unique", fields[-1],
+                                   f"{self._describe(fields, key)} also used by lot {index[key]}."))
+            else:
+                index[key] = lot
+
+        for ((determinant, dependent), index) in zip(self.dependencies, self._dependency_index):
+            key = self._values(row, determinant)
+            values = self._values(row, dependent)
+            if key is None or values is None:
+                continue
+            (expected, other_lot) = index.setdefault(key, (values, lot))
+            if expected != values:
+                violations.append(("dependency", dependent[0],
+                                   f"{self._describe(determinant, key)} has {self._describe(dependent, values)} "
+                                   f"here but {'/'.join(expected)} for lot {other_lot}."))
+
+        return violations
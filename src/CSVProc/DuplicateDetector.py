@@ -0,0 +1,284 @@
+# DuplicateDetector.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import errno
+import hashlib
+import operator
+import os
+import re
+import sqlite3
+import urllib.request
+from array import array
+from collections import defaultdict
+
+
+WORD_RE = re.compile(r"\w+")
+
+
+def _bucket_id(band_key: tuple) -> int:
+    """Returns a stable 64-bit id for a band bucket (band number, band values), for storing buckets in SQLite.
+    """
+    (band, values) = band_key
+    digest = hashlib.blake2b(band.to_bytes(4, "little") + array("Q", values).tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class DuplicateDetector:
+    """Finds lots with near-identical text using MinHash signatures and locality-sensitive hashing.
+
+    Each text is reduced to a set of word shingles and summarized by a fixed-length MinHash
+    signature (one-permutation hashing, so each shingle is hashed only once). Signatures are
+    split into bands; only lots that share a band bucket are compared, so detection runs in
+    roughly linear time instead of comparing every pair of lots. Buckets shared by very many lots
+    (ex: exact copies of one description) only contribute their most recent entries as candidates,
+    which keeps the worst case linear as well.
+
+    The index is kept in memory unless a SQLite connection is given, in which case signatures and
+    buckets are stored in tables of that database (used when processing out of core). Past auctions'
+    signatures are kept in a SQLite index file (see save()), which load() attaches for querying in
+    place: only the candidates of each query are read from it.
+    """
+
+    def __init__(self, *, num_perm: int = 128, bands: int = 16, shingle_size: int = 3, threshold: float = 0.8,
+                 max_candidates: int = 50, db: sqlite3.Connection = None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.max_candidates = max_candidates    # per bucket, per query
+
+        # fixed pseudo-random order in which each bin looks for a filled bin to copy (see signature())
+        self._probes = [sorted((j for j in range(num_perm) if j != i),
+                               key=lambda j, i=i: hashlib.blake2b(f"{i}:{j}".encode(), digest_size=4).digest())
+                        for i in range(num_perm)]
+
+        # (band, band values) -> keys of every signature in that bucket
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+
+        self._index = None  # connection to a past auctions' index file (see load())
+
+        self._db = db
+        if db is not None:
+            db.execute("CREATE TABLE IF NOT EXISTS dup_signatures (key TEXT PRIMARY KEY, signature BLOB)")
+            db.execute("CREATE TABLE IF NOT EXISTS dup_buckets (bucket INTEGER, key TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS dup_buckets_bucket ON dup_buckets (bucket)")
+            db.execute("DELETE FROM dup_signatures")
+            db.execute("DELETE FROM dup_buckets")
+
+
+    def _shingles(self, text: str) -> set:
+        """Returns the set of word shingles in 'text' (or the whole text if it is shorter than one shingle).
+        """
+        words = WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+
+    def signature(self, text: str) -> tuple:
+        """Computes the MinHash signature of 'text' using one-permutation hashing.
+
+        Each shingle is hashed once (blake2b rather than hash() so signatures are stable between runs
+        and can be persisted); the hash picks one of num_perm bins and competes for that bin's minimum.
+        Empty bins then copy the value of the first filled bin in their own fixed probe order
+        ("optimal densification"), so short texts still give unbiased similarity estimates.
+
+        Returns:
+            tuple: num_perm ints, or an empty tuple if 'text' contains no words.
+        """
+        shingles = self._shingles(text)
+        if not shingles:
+            return ()
+
+        num_perm = self.num_perm
+        bins = [None] * num_perm
+        for shingle in shingles:
+            h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+            b = h % num_perm
+            v = h // num_perm
+            if bins[b] is None or v < bins[b]:
+                bins[b] = v
+
+        if None not in bins:
+            return tuple(bins)
+
+        dense = list(bins)
+        for i in range(num_perm):
+            if bins[i] is None:
+                for j in self._probes[i]:
+                    if bins[j] is not None:
+                        dense[i] = bins[j]
+                        break
+
+        return tuple(dense)
+
+
+    def _band_keys(self, signature: tuple) -> list:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+
+    def add(self, key, signature: tuple):
+        """Indexes 'signature' under 'key' (ex: a lot number).
+        """
+        if not signature:
+            return
+
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO dup_signatures VALUES (?, ?)",
+                             (key, array("Q", signature).tobytes()))
+            self._db.executemany("INSERT INTO dup_buckets VALUES (?, ?)",
+                                 ((_bucket_id(band_key), key) for band_key in self._band_keys(signature)))
+            return
+
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].append(key)
+
+
+    def query(self, signature: tuple) -> list:
+        """Returns (key, similarity) for indexed signatures estimated to be at least 'threshold' similar.
+        """
+        if not signature:
+            return []
+
+        candidates = self._query_index(signature) if self._index is not None else {}
+        if self._db is not None:
+            candidates.update(self._query_db(signature))
+        else:
+            for band_key in self._band_keys(signature):
+                for key in self._buckets.get(band_key, ())[-self.max_candidates:]:
+                    candidates[key] = self._signatures[key]
+
+        matches = []
+        for (key, other) in candidates.items():
+            similarity = self.similarity(signature, other)
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+
+        return matches
+
+
+    def _query_db(self, signature: tuple) -> dict:
+        """Returns {key: signature} for the (most recently added) keys sharing a bucket with 'signature'.
+        """
+        buckets = [_bucket_id(band_key) for band_key in self._band_keys(signature)]
+        keys = [key for (key,) in self._db.execute(
+            f"SELECT DISTINCT key FROM dup_buckets WHERE bucket IN ({', '.join('?' * len(buckets))}) "
+            f"ORDER BY rowid DESC LIMIT ?", (*buckets, self.bands * self.max_candidates))]
+        if not keys:
+            return {}
+
+        return {key: tuple(array("Q", blob)) for (key, blob) in self._db.execute(
+            f"SELECT key, signature FROM dup_signatures WHERE key IN ({', '.join('?' * len(keys))})", keys)}
+
+
+    @staticmethod
+    def similarity(sig_a: tuple, sig_b: tuple) -> float:
+        """Estimates the Jaccard similarity of two texts from their signatures.
+        """
+        return sum(map(operator.eq, sig_a, sig_b)) / len(sig_a)
+
+
+    def _query_index(self, signature: tuple) -> dict:
+        """Returns {(auction, lot): signature} for the (most recently saved) past auctions' lots sharing a
+        bucket with 'signature'.
+        """
+        buckets = [_bucket_id(band_key) for band_key in self._band_keys(signature)]
+        return {(auction, lot): tuple(array("Q", blob)) for (auction, lot, blob) in self._index.execute(
+            f"SELECT auction, lot, signature FROM signatures WHERE id IN "
+            f"(SELECT signature_id FROM buckets WHERE bucket IN ({', '.join('?' * len(buckets))}) "
+            f"ORDER BY rowid DESC LIMIT ?)", (*buckets, self.bands * self.max_candidates))}
+
+
+    def items(self):
+        """Yields (key, signature) for every signature indexed by add() (streamed from the database, if
+        the index is kept in one).
+        """
+        if self._db is None:
+            yield from self._signatures.items()
+            return
+
+        for (key, blob) in self._db.execute("SELECT key, signature FROM dup_signatures"):
+            yield (key, tuple(array("Q", blob)))
+
+
+    def load(self, path: str):
+        """Attaches the past auctions' index at 'path' (see save()), read-only; query() then also returns
+        matching lots stored in it, keyed by (auction, lot) tuples.
+
+        Raises:
+            OSError: If the index doesn't exist.
+            ValueError: If it can't be read.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(errno.ENOENT, "no duplicate index", path)
+
+        try:
+            index = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+            index.execute("SELECT auction, lot, signature FROM signatures LIMIT 1")
+            index.execute("SELECT bucket, signature_id FROM buckets LIMIT 1")
+        except sqlite3.Error as e:
+            raise ValueError(f"Unreadable duplicate index {path} ({e}).") from None
+
+        self.close()
+        self._index = index
+
+
+    def save(self, path: str, auction: str):
+        """Stores the signatures indexed by add() as the lots of 'auction' in the past auctions' index at
+        'path' (a SQLite database, created if it doesn't exist), with their band buckets indexed for
+        load() & query(). Signatures are streamed into it (see items()).
+
+        Signatures previously stored for the same auction are replaced, in a single transaction, so the
+        index is never left partly updated.
+
+        Raises:
+            sqlite3.Error: If the index can't be opened or written.
+        """
+        db = sqlite3.connect(path)
+        try:
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS signatures (id INTEGER PRIMARY KEY, auction TEXT NOT NULL, "
+                           "lot TEXT NOT NULL, signature BLOB, UNIQUE (auction, lot))")
+                db.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER, signature_id INTEGER)")
+                db.execute("CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket)")
+                db.execute("CREATE INDEX IF NOT EXISTS buckets_signature ON buckets (signature_id)")
+
+                db.execute("DELETE FROM buckets WHERE signature_id IN (SELECT id FROM signatures WHERE auction = ?)",
+                           (auction,))
+                db.execute("DELETE FROM signatures WHERE auction = ?", (auction,))
+                for (lot, signature) in self.items():
+                    signature_id = db.execute("INSERT INTO signatures (auction, lot, signature) VALUES (?, ?, ?)",
+                                              (auction, lot, array("Q", signature).tobytes())).lastrowid
+                    db.executemany("INSERT INTO buckets VALUES (?, ?)",
+                                   ((_bucket_id(band_key), signature_id) for band_key in self._band_keys(signature)))
+        finally:
+            db.close()
+
+
+    def close(self):
+        """Detaches the past auctions' index (if loaded).
+        """
+        if self._index is not None:
+            self._index.close()
+            self._index = None
@@ -0,0 +1,133 @@
+# EstimateOutliers.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+import statistics
+
+try:
+    import numpy as np
+except ImportError:     # optional; the same statistics are computed in pure Python instead
+    np = None
+
+
+# scales the median absolute deviation so robust z-scores are comparable to standard ones
+MAD_SCALE = 0.6745
+
+# fewer lots than this aren't enough to say what's typical for a catalog
+MIN_LOTS = 10
+
+
+def _outliers_numpy(log_values: list, threshold: float, min_log_distance: float):
+    x = np.asarray(log_values, dtype=float)     # (None -> nan: not checked)
+    finite = np.isfinite(x)
+    if np.count_nonzero(finite) < MIN_LOTS:
+        return [], None
+
+    values = x[finite]
+    median = np.median(values)
+    deviation = np.abs(x - median)
+    scale = np.median(np.abs(values - median)) / MAD_SCALE
+
+    # (a scale of 0 means over half the values are identical; any other value is then an outlier)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = deviation / scale
+    mask = finite & (z > threshold) & (deviation >= min_log_distance)
+
+    return np.flatnonzero(mask).tolist(), float(median)
+
+
+def _outliers_python(log_values: list, threshold: float, min_log_distance: float):
+    values = [v for v in log_values if v is not None and math.isfinite(v)]
+    if len(values) < MIN_LOTS:
+        return [], None
+
+    median = statistics.median(values)
+    scale = statistics.median(abs(v - median) for v in values) / MAD_SCALE
+
+    outliers = []
+    for (i, v) in enumerate(log_values):
+        if v is None or not math.isfinite(v):
+            continue
+        deviation = abs(v - median)
+        if deviation >= min_log_distance and (scale == 0 or deviation / scale > threshold):
+            outliers.append(i)
+
+    return outliers, median
+
+
+def robust_outliers(log_values: list, *, threshold: float = 3.5, min_factor: float = 3.0):
+    """Finds outliers among (log-scaled) values using robust z-scores: (value - median) / scaled MAD.
+
+    The median & median absolute deviation aren't thrown off by the outliers themselves, unlike the
+    mean & standard deviation. If over half the values are identical (MAD of 0), every value at least
+    'min_factor' away from them is an outlier. Uses NumPy array operations if NumPy is installed.
+
+    Args:
+        log_values: natural logs of the values (None for values that shouldn't be checked).
+        threshold: robust z-score above which a value is an outlier.
+        min_factor: an outlier must also differ from the median by at least this factor (so that very
+            uniform catalogs don't flag small differences).
+
+    Returns:
+        tuple: (indexes of outliers in 'log_values', median log value or None if too few values).
+    """
+    if np is not None:
+        return _outliers_numpy(log_values, threshold, math.log(min_factor))
+    return _outliers_python(log_values, threshold, math.log(min_factor))
+
+
+def _log_ratio(numerator: float, denominator: float):
+    return math.log(numerator / denominator) if numerator > 0 and denominator > 0 else None
+
+
+def find_estimate_outliers(lots: list, lo_ests: list, hi_ests: list, reserves: list = None, *,
+                           threshold: float = 3.5) -> list:
+    """Finds lots whose estimates look out of line with the rest of the catalog (ex: a missing or extra zero).
+
+    Three statistics are checked, each on a log scale: the HiEst/LoEst ratio, the Reserve/LoEst ratio
+    and the LoEst itself.
+
+    Args:
+        lots: lot numbers; lo_ests, hi_ests & reserves are floats in the same order (reserves may be
+            None or contain 0 for lots without a reserve).
+
+    Returns:
+        list: (lot, field, message) for each outlier.
+    """
+    warnings = []
+
+    (outliers, median) = robust_outliers([_log_ratio(h, l) for (l, h) in zip(lo_ests, hi_ests)], threshold=threshold)
+    for i in outliers:
+        warnings.append((lots[i], "HiEst", f"HiEst/LoEst ratio of {hi_ests[i] / lo_ests[i]:.1f} is unusual for this "
+                                           f"catalog (typically {math.exp(median):.1f}); check for a missing or "
+                                           f"extra zero."))
+
+    if reserves is not None:
+        (outliers, median) = robust_outliers([_log_ratio(r or 0.0, l) for (l, r) in zip(lo_ests, reserves)],
+                                             threshold=threshold)
+        for i in outliers:
+            warnings.append((lots[i], "Reserve", f"Reserve/LoEst ratio of {reserves[i] / lo_ests[i]:.2f} is unusual "
+                                                 f"for this catalog (typically {math.exp(median):.2f}); check for a "
+                                                 f"missing or extra zero."))
+
+    (outliers, median) = robust_outliers([math.log(l) if l > 0 else None for l in lo_ests], threshold=threshold)
+    for i in outliers:
+        level = "high" if math.log(lo_ests[i]) > median else "low"
+        warnings.append((lots[i], "LoEst", f"LoEst of ${lo_ests[i]:,.0f} is unusually {level} for this catalog "
+                                           f"(median ${math.exp(median):,.0f}); check for a missing or extra zero."))
+
+    return warnings
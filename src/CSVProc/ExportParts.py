@@ -0,0 +1,165 @@
+# ExportParts.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import io
+import os
+
+from src.CSVProc.OutputManifest import OutputManifest
+
+
+class ExportParts:
+    """Writes an export's rows to numbered part files of limited size, for platforms that limit uploads.
+
+    Rows are streamed: each one is formatted, measured and written to the current part, and a new
+    part (with its own header row) is started before any row that would take the current one past
+    'max_rows' rows or 'max_bytes' bytes. Since each row is one lot, parts always split on lot
+    boundaries. With no limits, everything goes to 'filename' itself; with limits, parts are named
+    "<filename>_part1.csv", "_part2", etc.
+
+    Parts are written through an OutputManifest and committed together when the 'with' block exits
+    normally (files left over from an earlier export of the same name are removed: the unsplit file
+    and any extra parts when splitting, every part when not); if the block raises or discard() was
+    called, none of them are.
+    """
+
+    def __init__(self, outputs: OutputManifest, filename: str, *, max_rows: int = 0, max_bytes: int = 0):
+        """
+        Args:
+            outputs: the destination folder's OutputManifest.
+            filename: the export file name (ex: "Invalu_Export_01_01_2021.csv").
+            max_rows: max. lots per part (0 = no limit).
+            max_bytes: max. size of a part in bytes, header included (0 = no limit). A single row
+                larger than this still gets a part of its own.
+        """
+        self.outputs = outputs
+        self.filename = filename
+        self.max_rows = max_rows or 0
+        self.max_bytes = max_bytes or 0
+        self.parts = []     # OutputFiles, in order
+
+        self._header = ""
+        self._buffer = io.StringIO(newline="")  # (rows are formatted here first to measure them)
+        self._formatter = None
+        self._part_rows = 0
+        self._part_bytes = 0
+        self._discarded = False
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        commit = exc_type is None and not self._discarded
+        parts = iter(self.parts)
+        try:
+            for part in parts:
+                if not commit:
+                    part.discard()
+                part.__exit__(None, None, None)
+        except BaseException:
+            for part in parts:  # (the parts after the one that failed)
+                part.discard()
+                part.__exit__(None, None, None)
+            raise
+
+        if commit:
+            self._remove_stale_parts()
+
+
+    @property
+    def is_split(self) -> bool:
+        """Whether rows go to numbered part files (i.e. a limit is set).
+        """
+        return bool(self.max_rows or self.max_bytes)
+
+
+    def part_filename(self, number: int) -> str:
+        if not self.is_split:
+            return self.filename
+        return self._numbered_filename(number)
+
+
+    def _numbered_filename(self, number: int) -> str:
+        (stem, ext) = os.path.splitext(self.filename)
+        return f"{stem}_part{number}{ext}"
+
+
+    def _format(self, write, *args) -> str:
+        """Returns the text written by 'write' (a method of self._formatter).
+        """
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        write(*args)
+        return self._buffer.getvalue()
+
+
+    def _size(self, text: str) -> int:
+        return len(text.encode(self.parts[-1].encoding if self.parts else "utf-8", errors="replace"))
+
+
+    def _start_part(self):
+        part = self.outputs.open(self.part_filename(len(self.parts) + 1), newline="")
+        self.parts.append(part)
+        part.write(self._header)
+        self._part_rows = 0
+        self._part_bytes = self._size(self._header)
+
+
+    def start(self, fieldnames: list):
+        """Sets the export's columns & starts the first part (with a header row, even if no rows follow).
+        """
+        self._formatter = csv.DictWriter(self._buffer, fieldnames)
+        self._header = self._format(self._formatter.writeheader)
+        self._start_part()
+
+
+    def writerow(self, row: dict):
+        """Writes one row (a dict keyed by the export's columns), starting a new part first if needed.
+        """
+        text = self._format(self._formatter.writerow, row)
+        size = self._size(text)
+        if self._part_rows and ((self.max_rows and self._part_rows >= self.max_rows) or
+                                (self.max_bytes and self._part_bytes + size > self.max_bytes)):
+            self._start_part()
+
+        self.parts[-1].write(text)
+        self._part_rows += 1
+        self._part_bytes += size
+
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+    def discard(self):
+        self._discarded = True
+
+
+    def _remove_stale_parts(self):
+        """Removes the files of an earlier export of the same name that this one didn't replace (ex: after
+        switching between split & unsplit exports on the same day).
+        """
+        if self.is_split:
+            self.outputs.remove(self.filename)
+            number = len(self.parts) + 1
+        else:
+            number = 1
+        while self.outputs.remove(self._numbered_filename(number)):
+            number += 1
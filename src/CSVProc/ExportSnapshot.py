@@ -0,0 +1,134 @@
+# ExportSnapshot.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import uuid
+
+
+class ExportSnapshot:
+    """Record of the rows last exported for one platform: {lot key: content hash}.
+
+    Rows of a new export are passed through observe() as they are written, which reports whether
+    each lot is new or changed since the snapshot was taken. Lots in the old snapshot that were never
+    observed have been removed. Every lookup is a dict access, so comparing costs O(lots).
+
+    A new snapshot is saved as pending (beside the previous one) and only becomes the baseline of
+    the next comparison once accepted (ex: after the delta export has been uploaded), so exporting
+    again before then produces the same delta.
+    """
+
+    def __init__(self, path: str, key_fields: list):
+        """
+        Args:
+            path: JSON file holding the previous snapshot (it need not exist yet).
+            key_fields: export columns that identify a lot (ex: ["Lot Number", "Lot Ext"]).
+        """
+        self.path = path
+        self.key_fields = key_fields
+        self.current = {}
+        self.added = 0
+        self.changed = 0
+
+        try:
+            with open(path, "r") as snapshot_file:
+                self.previous = json.load(snapshot_file)
+        except (OSError, ValueError):
+            self.previous = {}
+
+
+    def key(self, row: dict) -> str:
+        return "|".join(str(row.get(field, "")) for field in self.key_fields)
+
+
+    @staticmethod
+    def digest(row: dict) -> str:
+        """Hashes a row's content (independently of key order).
+        """
+        content = "\x1f".join(f"{k}\x1e{row[k]}" for k in sorted(row))
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+    def observe(self, row: dict) -> bool:
+        """Adds 'row' to the new snapshot.
+
+        Returns:
+            bool: True if the row's lot is new or its content changed since the previous snapshot.
+        """
+        key = self.key(row)
+        digest = self.digest(row)
+        self.current[key] = digest
+
+        previous = self.previous.get(key)
+        if previous == digest:
+            return False
+
+        if previous is None:
+            self.added += 1
+        else:
+            self.changed += 1
+        return True
+
+
+    def retain(self, key: str):
+        """Keeps the previous snapshot's entry for 'key' (a lot left out of this export without being removed).
+        """
+        if key in self.previous:
+            self.current[key] = self.previous[key]
+
+
+    def removed(self) -> list:
+        """Returns the keys of lots in the previous snapshot that were not observed in this export.
+        """
+        return [key for key in self.previous if key not in self.current]
+
+
+    @staticmethod
+    def pending_path(path: str) -> str:
+        return path + ".pending"
+
+
+    def save(self):
+        """Saves this export's snapshot as pending (atomically; see accept()).
+        """
+        pending_path = self.pending_path(self.path)
+        staging_path = f"{pending_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(staging_path, "x") as staging_file:
+                json.dump(self.current, staging_file)
+            os.replace(staging_path, pending_path)
+        except BaseException:
+            try:
+                os.remove(staging_path)
+            except OSError:
+                pass
+            raise
+
+
+    @classmethod
+    def accept(cls, path: str) -> bool:
+        """Makes the pending snapshot saved for 'path' (if any) the baseline of the next export.
+
+        Returns:
+            bool: Whether there was a pending snapshot.
+        """
+        try:
+            os.replace(cls.pending_path(path), path)
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,107 @@
+# ImageManifest.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+# file extensions accepted as lot images
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# leading bytes of valid image files
+IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n")
+
+# AuctionFlex's preview image naming (ex: 205A_1.jpg for the first image of lot 205A)
+DEFAULT_IMAGE_PATTERN = "{lot}{ext}_{n}"
+
+
+class ImageManifest:
+    """Checks that the preview images expected for each lot exist and look like valid JPEG/PNG files.
+
+    The image folder is listed once (case-insensitively, by file name without extension); lookups
+    are then dict accesses rather than a stat() per lot. Only the first bytes of each image are read,
+    and lots are checked on a thread pool since the work is almost entirely waiting on the disk.
+    """
+
+    def __init__(self, directory: str, *, pattern: str = DEFAULT_IMAGE_PATTERN, images_per_lot: int = 1,
+                 workers: int = None):
+        """
+        Args:
+            directory: folder containing the exported preview images.
+            pattern: image file name without extension; {lot}, {ext} & {n} (1-based image number)
+                are filled in for each lot (ex: "{lot}{ext}_{n}").
+            images_per_lot: number of images every lot is expected to have.
+            workers: threads used to check images (None = ThreadPoolExecutor's default).
+
+        Raises:
+            OSError: If 'directory' can't be listed.
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.images_per_lot = images_per_lot
+        self.workers = workers
+
+        # {lowercase file name without extension: DirEntry}
+        self._listing = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                (stem, extension) = os.path.splitext(entry.name)
+                if extension.lower() in IMAGE_EXTENSIONS and entry.is_file():
+                    self._listing.setdefault(stem.lower(), entry)
+
+
+    def expected(self, lot: str, ext: str = "") -> list:
+        """Returns the image names (without extension) expected for lot 'lot' + 'ext'.
+        """
+        return [self.pattern.format(lot=lot, ext=ext, n=n) for n in range(1, self.images_per_lot + 1)]
+
+
+    def check_lot(self, lot: str, ext: str = "") -> list:
+        """Returns (image name, problem) for every missing or invalid image of one lot.
+        """
+        problems = []
+        for name in self.expected(lot, ext):
+            entry = self._listing.get(name.lower())
+            if entry is None:
+                problems.append((name, "missing"))
+                continue
+
+            # (the header read tells an empty file apart too, so no stat() is needed)
+            try:
+                with open(entry.path, "rb") as image_file:
+                    header = image_file.read(8)
+            except OSError:
+                problems.append((entry.name, "unreadable"))
+                continue
+
+            if not header:
+                problems.append((entry.name, "empty"))
+            elif not header.startswith(IMAGE_SIGNATURES):
+                problems.append((entry.name, "not a valid JPEG/PNG file"))
+
+        return problems
+
+
+    def check(self, lots: list) -> dict:
+        """Checks every (lot, ext) pair in 'lots' in parallel.
+
+        Returns:
+            dict: {(lot, ext): [(image name, problem), ...]} for lots with at least one problem.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda lot: self.check_lot(*lot), lots)
+            return {lot: problems for (lot, problems) in zip(lots, results) if problems}
@@ -0,0 +1,170 @@
+# LotHistory.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import datetime
+import hashlib
+import os
+import sqlite3
+import urllib.request
+
+
+# lot values kept per catalog (columns of both the history & staging tables, after the keys)
+VALUE_COLUMNS = ("lot", "consignor", "ref", "fingerprint", "lo_est", "hi_est", "start_bid", "reserve", "title",
+                 "description")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LotHistory:
+    """SQLite database of the lots of past catalogs, for finding lots offered again in a new catalog.
+
+    A lot is identified across auctions by its consignor & reference numbers (Consign# + Ref#), or
+    by a fingerprint of its title & description if it has neither. Both are indexed, so finding a
+    lot's past offerings stays fast as the history grows. A new catalog's processed lots are staged
+    in a temporary table (batch by batch if need be) and matched against the history with a single
+    join; save() then records them as the auction's entry, replacing any earlier run on the same
+    auction. Auctions are told apart by an id (ex: the sale number), which by default is the catalog's
+    file name; an id has to be given where file names get reused from one auction to the next.
+    """
+
+    def __init__(self, db_path: str, catalog: str, auction: str, *, read_only: bool = False):
+        """
+        Args:
+            db_path: the history database (created if it doesn't exist, unless 'read_only').
+            catalog: name of the catalog being processed (ex: its file name), as shown in warnings.
+            auction: id of the auction the catalog is for (the same for every run on that auction).
+            read_only: only compare against the history (the database file is never written; save()
+                fails).
+
+        Raises:
+            sqlite3.Error: If the database can't be opened (or, if 'read_only', doesn't exist or is in
+                an older format).
+        """
+        self.catalog = catalog
+        self.auction = auction
+        self.timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+
+        if read_only:
+            self._db = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(db_path))}?mode=ro",
+                                       uri=True)
+            if "auction" not in [row[1] for row in self._db.execute("PRAGMA table_info(lots)")]:
+                self._db.close()
+                raise sqlite3.OperationalError("lot history is empty or in an older format")
+            # (the staged lots go in a temporary table, which lives outside the database file)
+            self._db.execute(f"CREATE TEMP TABLE current (seq INTEGER PRIMARY KEY, {', '.join(VALUE_COLUMNS)})")
+            return
+
+        self._db = sqlite3.connect(db_path)
+        with self._db:
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(lots)")]
+            if columns and "auction" not in columns:
+                # (a history from before auctions had ids; each catalog name becomes an auction)
+                self._db.execute("ALTER TABLE lots RENAME TO lots_by_catalog")
+            self._db.execute("CREATE TABLE IF NOT EXISTS lots (auction TEXT NOT NULL, catalog TEXT NOT NULL, "
+                             "timestamp TEXT, lot TEXT NOT NULL, consignor TEXT, ref TEXT, fingerprint TEXT, "
+                             "lo_est REAL, hi_est REAL, start_bid REAL, reserve REAL, title TEXT, description TEXT, "
+                             "PRIMARY KEY (auction, lot))")
+            if columns and "auction" not in columns:
+                self._db.execute(f"INSERT INTO lots SELECT catalog, catalog, timestamp, {', '.join(VALUE_COLUMNS)} "
+                                 f"FROM lots_by_catalog")
+                self._db.execute("DROP TABLE lots_by_catalog")
+        self._db.execute("CREATE INDEX IF NOT EXISTS lots_key ON lots (consignor, ref)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS lots_fingerprint ON lots (fingerprint)")
+        self._db.execute(f"CREATE TEMP TABLE current (seq INTEGER PRIMARY KEY, {', '.join(VALUE_COLUMNS)})")
+        self._db.commit()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+    @staticmethod
+    def fingerprint(title: str, description: str) -> str:
+        """Hashes a lot's title & description (ignoring case & whitespace differences).
+        """
+        text = " ".join(title.lower().split()) + "\n" + " ".join(description.lower().split())
+        return hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+
+
+    def stage(self, records: list):
+        """Adds processed catalog rows (dicts with "LotNum", "Title" & "Desc", and optionally "Consign#",
+        "Ref#", "LoEst", "HiEst", "StartBid" & "Reserve" fields) to the catalog being compared & saved.
+        """
+        rows = []
+        for record in records:
+            consignor = (record.get("Consign#") or "").strip()
+            ref = (record.get("Ref#") or "").strip()
+            if not (consignor and ref):
+                consignor = ref = None  # (matched by fingerprint only)
+            title = record.get("Title") or ""
+            description = record.get("Desc") or ""
+            rows.append((record["LotNum"], consignor, ref, self.fingerprint(title, description),
+                         _number(record.get("LoEst")), _number(record.get("HiEst")),
+                         _number(record.get("StartBid")), _number(record.get("Reserve")), title, description))
+
+        self._db.executemany(f"INSERT INTO current ({', '.join(VALUE_COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(VALUE_COLUMNS))})", rows)
+
+
+    def previous_offerings(self):
+        """Yields (current, previous) for each staged lot offered in an earlier catalog, in staging order.
+
+        Both are dicts of the lot's values (see VALUE_COLUMNS); 'previous' also has "catalog" &
+        "timestamp" keys and is the lot's most recent offering in another auction.
+        """
+        columns = ", ".join(f"c.{column}" for column in VALUE_COLUMNS) + ", h.catalog, h.timestamp, " + \
+            ", ".join(f"h.{column}" for column in VALUE_COLUMNS)
+        cursor = self._db.execute(
+            f"SELECT c.seq, {columns} FROM current AS c JOIN lots AS h "
+            f"ON h.consignor = c.consignor AND h.ref = c.ref WHERE h.auction != ? "
+            f"UNION ALL "
+            f"SELECT c.seq, {columns} FROM current AS c JOIN lots AS h "
+            f"ON h.fingerprint = c.fingerprint WHERE c.consignor IS NULL AND h.auction != ? "
+            f"ORDER BY 1, {len(VALUE_COLUMNS) + 3} DESC", (self.auction, self.auction))
+
+        n = len(VALUE_COLUMNS)
+        last_seq = None
+        for row in cursor:
+            if row[0] == last_seq:
+                continue    # (an older offering of the same lot)
+            last_seq = row[0]
+            current = dict(zip(VALUE_COLUMNS, row[1:n + 1]))
+            previous = dict(zip(("catalog", "timestamp") + VALUE_COLUMNS, row[n + 1:]))
+            yield (current, previous)
+
+
+    def save(self):
+        """Records the staged lots as this auction's entry in the history (replacing an earlier one).
+        """
+        with self._db:
+            self._db.execute("DELETE FROM lots WHERE auction = ?", (self.auction,))
+            self._db.execute(f"INSERT OR REPLACE INTO lots (auction, catalog, timestamp, {', '.join(VALUE_COLUMNS)}) "
+                             f"SELECT ?, ?, ?, {', '.join(VALUE_COLUMNS)} FROM current ORDER BY seq",
+                             (self.auction, self.catalog, self.timestamp))
+
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,208 @@
+# MemoryHarness.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Memory regression harness: runs CSVProc.process() on generated catalogs of increasing size under
+# tracemalloc and fails if memory per row exceeds a budget. Ex:
+#   python -m src.CSVProc.MemoryHarness --sizes 1000 5000 20000 --budget 20000
+#   python -m src.CSVProc.MemoryHarness --disk-store --stage-budget _write_export_rows=200
+
+import argparse
+import csv
+import functools
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from src.CSVProc.CSVProc import CSVProc
+from src.CSVProc.ProcessorConfig import ProcessorConfig
+
+
+# CSVProc methods measured separately (nested stages are included in their callers' figures too)
+# ("run" itself gives the whole run's figures)
+STAGES = ["run", "_load_af_csv", "_load_store", "_fix_descriptions", "_check_truncation", "_check_estimate_outliers",
+          "_prepare_invaluable", "_prepare_liveauctioneers", "_write_export_rows", "_export_invaluable",
+          "_export_liveauctioneers", "_export_from_store", "_finish_run"]
+
+HEADERS = ["LotNum", "Title", "Desc. 1", "Desc. 2", "Desc. 3", "Desc. 4", "Desc. 5", "Qty", "LoEst", "HiEst",
+           "StartBid", "Condition"]
+
+WORDS = ("antique victorian mahogany walnut oak chair table chest drawers carved gilt bronze silver sterling "
+         "porcelain vase bowl plate pair signed marked framed oil canvas painting print lamp glass crystal "
+         "figure clock mirror brass copper rug wool with and the of some wear losses age minor chips").split()
+
+
+def generate_catalog(path: str, rows: int, seed: int = 0):
+    """Writes an AuctionFlex-style catalog with 'rows' lots of random (but realistic) text & numbers.
+    """
+    rng = random.Random(seed)
+
+    def text(min_words, max_words, end="."):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + end
+
+    with open(path, "w", newline="", encoding="latin-1") as catalog_file:
+        writer = csv.writer(catalog_file, quoting=csv.QUOTE_ALL)
+        for lot in range(1, rows + 1):
+            lo_est = rng.choice((50, 100, 200, 500, 1000))
+            descs = [text(10, 35)] + [text(5, 30) if rng.random() < 0.3 else "" for _ in range(4)]
+            writer.writerow([str(lot).rjust(10) + ("A" if rng.random() < 0.05 else ""), text(2, 8, end=""),
+                             *descs, "1.00", f"{lo_est:.2f}", f"{lo_est * 2:.2f}", f"{lo_est / 2:.2f}",
+                             text(3, 20)])
+
+
+class StageRecorder:
+    """Wraps a CSVProc instance's stage methods to record memory per stage while tracemalloc runs.
+
+    For each stage: number of calls, peak traced memory above the level at entry, memory still held
+    at exit (retained) and the change in allocated memory blocks (sys.getallocatedblocks()).
+    """
+
+    def __init__(self, processor: CSVProc, stages: list = None):
+        self.results = {}
+        self._stack = []    # [entry memory, peak seen while nested stages ran] per active stage
+
+        for stage in stages or STAGES:
+            setattr(processor, stage, self._wrap(stage, getattr(processor, stage)))
+
+
+    def _wrap(self, stage: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            (current, peak) = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            self._stack.append([current, current])
+            blocks = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                (exit_current, exit_peak) = tracemalloc.get_traced_memory()
+                (entry, nested_peak) = self._stack.pop()
+                stage_peak = max(exit_peak, nested_peak)
+
+                result = self.results.setdefault(stage, {"calls": 0, "peak": 0, "retained": 0, "blocks": 0})
+                result["calls"] += 1
+                result["peak"] = max(result["peak"], stage_peak - entry)
+                result["retained"] += exit_current - entry
+                result["blocks"] += sys.getallocatedblocks() - blocks
+
+                # (the caller's peak must still include this stage's)
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], stage_peak)
+                tracemalloc.reset_peak()
+
+        return wrapper
+
+
+def measure(rows: int, directory: str, *, use_disk_store: bool = False) -> dict:
+    """Processes a generated catalog of 'rows' lots under tracemalloc.
+
+    Returns:
+        dict: {"rows", "peak", "retained", "blocks", "stages": {stage: {...}}} (memory in bytes).
+    """
+    src_path = os.path.join(directory, f"catalog_{rows}.csv")
+    generate_catalog(src_path, rows)
+    dest_path = os.path.join(directory, f"out_{rows}")
+    os.makedirs(dest_path, exist_ok=True)
+
+    # (one parse worker: worker processes' memory isn't visible to tracemalloc)
+    processor = CSVProc(ProcessorConfig(parse_workers=1, use_disk_store=use_disk_store, store_directory=directory))
+    processor.src_path = src_path
+    processor.dest_path = dest_path
+    processor.get_n_rows(1)
+    processor.set_file_col_headers(HEADERS)
+    session = processor.session()
+    recorder = StageRecorder(session)
+
+    errors = []
+    tracemalloc.start()
+    try:
+        session.run(progress_callback=lambda *_: None, result_callback=errors.append)
+    finally:
+        tracemalloc.stop()
+
+    fatal = [e for e in errors if "warnings generated" not in e]
+    if fatal:
+        raise RuntimeError(f"Processing failed: {fatal}")
+
+    total = recorder.results.pop("run")
+    return {"rows": rows, "peak": total["peak"], "retained": total["retained"], "blocks": total["blocks"],
+            "stages": recorder.results}
+
+
+def report(result: dict) -> str:
+    rows = result["rows"]
+    lines = [f"{rows} rows: peak {result['peak'] / 2**20:.1f} MiB ({result['peak'] / rows:.0f} B/row), "
+             f"retained {result['retained'] / rows:.0f} B/row, {result['blocks'] / rows:.1f} blocks/row",
+             f"  {'stage':<26}{'calls':>7}{'peak B/row':>12}{'retained B/row':>16}{'blocks/row':>12}"]
+    for (stage, r) in result["stages"].items():
+        lines.append(f"  {stage:<26}{r['calls']:>7}{r['peak'] / rows:>12.0f}{r['retained'] / rows:>16.0f}"
+                     f"{r['blocks'] / rows:>12.1f}")
+
+    return "\n".join(lines)
+
+
+def check_budgets(result: dict, budget: float = None, stage_budgets: dict = None) -> list:
+    """Returns a message for each budget (peak bytes per row) that 'result' exceeds.
+    """
+    rows = result["rows"]
+    failures = []
+    if budget is not None and result["peak"] / rows > budget:
+        failures.append(f"{rows} rows: peak {result['peak'] / rows:.0f} B/row exceeds budget of {budget:.0f} B/row")
+
+    for (stage, stage_budget) in (stage_budgets or {}).items():
+        stage_result = result["stages"].get(stage)
+        if stage_result is not None and stage_result["peak"] / rows > stage_budget:
+            failures.append(f"{rows} rows: {stage} peak {stage_result['peak'] / rows:.0f} B/row exceeds budget "
+                            f"of {stage_budget:.0f} B/row")
+
+    return failures
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure CSVProc memory use per pipeline stage.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000],
+                        help="catalog sizes (rows) to generate & process")
+    parser.add_argument("--budget", type=float, default=None, help="max. peak bytes per row for a whole run")
+    parser.add_argument("--stage-budget", action="append", default=[], metavar="STAGE=BYTES",
+                        help="max. peak bytes per row for one stage (may be repeated)")
+    parser.add_argument("--disk-store", action="store_true", help="process out of core (CSVProc.use_disk_store)")
+    args = parser.parse_args(argv)
+
+    stage_budgets = {}
+    for entry in args.stage_budget:
+        (stage, _, limit) = entry.partition("=")
+        stage_budgets[stage] = float(limit)
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="af_csv_proc_mem_") as directory:
+        for rows in args.sizes:
+            result = measure(rows, directory, use_disk_store=args.disk_store)
+            print(report(result) + "\n")
+            failures += check_budgets(result, args.budget, stage_budgets)
+
+    for failure in failures:
+        print("FAIL: " + failure)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
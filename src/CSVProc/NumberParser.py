@@ -0,0 +1,108 @@
+# NumberParser.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import re
+
+
+# (catalogs are cp1252 decoded as latin-1, so "€" & dashes may also arrive as \x80, \x96 & \x97; see TextRepair)
+
+# currency symbols & codes that may surround an amount (ex: "$1,200", "1.200,00 EUR")
+CURRENCY_RE = re.compile(r"[$€£¥\x80]|\b(?:USD|CAD|AUD|NZD|EUR|GBP|CHF)\b", re.IGNORECASE)
+
+# separators between the two amounts of a range (ex: "200-300", "$200 – $300", "200 to 300")
+RANGE_RE = re.compile(r"^(.*?\d.*?)\s*(?:-|–|—|\x96|\x97|\bto\b)\s*(.*?\d.*)$", re.IGNORECASE)
+
+
+class NumberParser:
+    """Parses amounts as catalogers type them: "1200", "$1,200", "1.200,00 EUR", "1'200" or ranges like "200-300".
+
+    Plain numbers (the vast majority) are matched by a precompiled pattern & converted directly;
+    anything else goes through a slower normalizer that removes currency symbols/codes & whitespace
+    and resolves thousands separators. Separators are read according to 'decimal_separator', except
+    that a value using both "." and "," unambiguously has its decimal separator last. Values with
+    misplaced separators (ex: "1,20,0") aren't parsed. Results are cached per distinct raw string,
+    since catalogs repeat the same amounts over and over.
+    """
+
+    def __init__(self, decimal_separator: str = "."):
+        """
+        Args:
+            decimal_separator: "." (ex: 1,200.50) or "," (ex: 1.200,50).
+        """
+        if decimal_separator not in (".", ","):
+            raise ValueError(f"Unsupported decimal separator {decimal_separator!r}.")
+
+        self.decimal_separator = decimal_separator
+        self._plain_re = re.compile(r"\s*[-+]?\d+(?:" + re.escape(decimal_separator) + r"\d*)?\s*")
+        self._cache = {}        # raw string -> float or None
+        self._range_cache = {}  # raw string -> (float, float) or None
+
+
+    def parse(self, raw: str):
+        """Returns the amount in 'raw' as a float, or None if it isn't a (single) amount.
+        """
+        value = self._cache.get(raw, self)  # ('self' marks a miss, since None is a valid result)
+        if value is self:
+            if self._plain_re.fullmatch(raw):
+                value = float(raw.replace(",", ".") if self.decimal_separator == "," else raw)
+            else:
+                value = self._normalize(raw)
+            self._cache[raw] = value
+
+        return value
+
+
+    def _normalize(self, raw: str):
+        text = CURRENCY_RE.sub("", raw)
+        text = "".join(text.split()).replace("'", "")   # (whitespace & apostrophes group thousands too)
+        sign = ""
+        if text[:1] in ("+", "-"):
+            (sign, text) = (text[:1], text[1:])
+        if not text or not text[0].isdigit():
+            return None
+
+        decimal = self.decimal_separator
+        if "." in text and "," in text:
+            decimal = "." if text.rfind(".") > text.rfind(",") else ","
+        thousands = "," if decimal == "." else "."
+
+        (whole, _, fraction) = text.partition(decimal)
+        if not fraction.isdecimal() and fraction:
+            return None
+        groups = whole.split(thousands)
+        if not all(group.isdecimal() for group in groups):
+            return None
+        if len(groups) > 1 and (len(groups[0]) > 3 or any(len(group) != 3 for group in groups[1:])):
+            return None     # (separators in the wrong places)
+
+        return float(sign + "".join(groups) + ("." + fraction if fraction else ""))
+
+
+    def parse_range(self, raw: str):
+        """Returns (low, high) for a range of two amounts in ascending order (ex: "200-300"), else None.
+        """
+        result = self._range_cache.get(raw, self)
+        if result is self:
+            result = None
+            match = RANGE_RE.match(raw.strip())
+            if match:
+                (low, high) = (self.parse(match[1]), self.parse(match[2]))
+                if low is not None and high is not None and 0 <= low < high:
+                    result = (low, high)
+            self._range_cache[raw] = result
+
+        return result
@@ -0,0 +1,234 @@
+# OutputManifest.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+
+
+class OutputManifest:
+    """Writes output files to a folder atomically, skipping files whose content hasn't changed.
+
+    Output is first written to a local temporary file and hashed. If the destination file's hash
+    (recorded in a small manifest in the destination folder) and size match, nothing is written;
+    otherwise the content is copied next to the destination and renamed over it, so a reader never
+    sees a half-written file.
+    """
+
+    MANIFEST_NAME = ".af_csv_proc_manifest.json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, self.MANIFEST_NAME)
+        self.written = []   # names of files written (changed or new)
+        self.skipped = []   # names of files left untouched (content unchanged)
+
+        try:
+            with open(self.path, "r") as manifest_file:
+                self._entries = json.load(manifest_file)
+        except (OSError, ValueError):
+            self._entries = {}
+
+
+    def open(self, filename: str, *, newline: str = None) -> "OutputFile":
+        """Returns an OutputFile for 'filename' (in self.directory), to be used as a context manager.
+
+        Ex:
+            with manifest.open("Invalu_Export.csv", newline="") as export_file:
+                csv.writer(export_file).writerow(...)
+        """
+        return OutputFile(self, filename, newline)
+
+
+    def remove(self, filename: str) -> bool:
+        """Deletes 'filename' (in self.directory) if it exists, along with its manifest entry.
+
+        Returns:
+            bool: Whether a file was deleted.
+        """
+        try:
+            os.remove(os.path.join(self.directory, filename))
+            removed = True
+        except FileNotFoundError:
+            removed = False
+
+        if self._entries.pop(filename, None) is not None:
+            self._save()
+
+        return removed
+
+
+    def _commit(self, filename: str, temp_file):
+        temp_file.flush()
+        buffer = temp_file.buffer
+        buffer.seek(0)
+
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: buffer.read(1 << 16), b""):
+            digest.update(chunk)
+        size = buffer.tell()
+        entry = {"hash": digest.hexdigest(), "size": size}
+
+        path = os.path.join(self.directory, filename)
+        try:
+            unchanged = self._entries.get(filename) == entry and os.stat(path).st_size == size
+        except OSError:
+            unchanged = False   # file was deleted since it was recorded
+
+        if unchanged:
+            self.skipped.append(filename)
+            return
+
+        staging_path = self._staging_path(filename)
+        try:
+            with open(staging_path, "xb") as staging_file:
+                buffer.seek(0)
+                shutil.copyfileobj(buffer, staging_file)
+            os.replace(staging_path, path)
+        except BaseException:
+            try:
+                os.remove(staging_path)
+            except OSError:
+                pass
+            raise
+
+        self._entries[filename] = entry
+        self.written.append(filename)
+        self._save()
+
+
+    def _staging_path(self, filename: str) -> str:
+        """Returns a unique hidden path beside 'filename' (so the final rename stays within one file system).
+        """
+        return os.path.join(self.directory, f".{filename}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+    def _save(self):
+        staging_path = self._staging_path(self.MANIFEST_NAME)
+        with open(staging_path, "x") as staging_file:
+            json.dump(self._entries, staging_file)
+        os.replace(staging_path, self.path)
+
+
+    def close(self):
+        """Finishes writing (nothing to do here: files are complete once committed; see ZipOutputManifest).
+        """
+
+
+class ZipOutputManifest(OutputManifest):
+    """Writes output files into a single compressed .zip archive in a folder, instead of as separate files.
+
+    Each file is compressed into the archive as soon as it's committed, so the archive is written
+    incrementally during a run. It's built under a temporary name and renamed into place by close(),
+    so a reader never sees a half-written archive. Every committed file is written (there's no
+    skipping of unchanged content), and nothing is created if no file was committed.
+    """
+
+    def __init__(self, directory: str, archive_name: str):
+        """
+        Args:
+            directory: the folder the archive is saved in.
+            archive_name: the archive's file name (ex: "Catalog_Export_01_01_2021.zip").
+        """
+        self.directory = directory
+        self.archive_name = archive_name
+        self.path = os.path.join(directory, archive_name)
+        self.written = []
+        self.skipped = []
+
+        self._staging = None    # path of the archive being written
+        self._archive = None
+
+
+    def remove(self, filename: str) -> bool:
+        # (a new archive never holds files from an earlier run)
+        return False
+
+
+    def _commit(self, filename: str, temp_file):
+        temp_file.flush()
+        buffer = temp_file.buffer
+        buffer.seek(0)
+
+        if self._archive is None:
+            self._staging = self._staging_path(self.archive_name)
+            self._archive = zipfile.ZipFile(self._staging, "x", compression=zipfile.ZIP_DEFLATED)
+
+        with self._archive.open(filename, "w", force_zip64=True) as member:
+            shutil.copyfileobj(buffer, member)
+        self.written.append(filename)
+
+
+    def close(self):
+        """Completes the archive & moves it into place (or removes it if completing it fails).
+        """
+        if self._archive is None:
+            return
+
+        (archive, self._archive) = (self._archive, None)
+        try:
+            archive.close()
+            os.replace(self._staging, self.path)
+        except BaseException:
+            try:
+                os.remove(self._staging)
+            except OSError:
+                pass
+            raise
+
+
+class OutputFile:
+    """A text file being written through an OutputManifest.
+
+    Committed when its 'with' block exits normally; discarded (leaving any existing destination file
+    untouched) if the block raises or discard() was called.
+    """
+
+    def __init__(self, manifest: OutputManifest, filename: str, newline: str = None):
+        self._manifest = manifest
+        self.filename = filename
+        self._file = tempfile.TemporaryFile("w+", newline=newline)
+        self._discarded = False
+
+
+    @property
+    def encoding(self) -> str:
+        return self._file.encoding
+
+
+    def write(self, s: str) -> int:
+        return self._file.write(s)
+
+
+    def discard(self):
+        self._discarded = True
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None and not self._discarded:
+                self._manifest._commit(self.filename, self._file)
+        finally:
+            self._file.close()
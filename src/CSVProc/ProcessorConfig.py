@@ -0,0 +1,87 @@
+# ProcessorConfig.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import dataclasses
+from types import MappingProxyType
+
+from src.CSVProc.ImageManifest import DEFAULT_IMAGE_PATTERN
+
+
+@dataclasses.dataclass(frozen=True)
+class ProcessorConfig:
+    """Immutable set of CSVProc processing options.
+
+    A CSVProc reads its options from its ProcessorConfig (ex: processor.using_bp_condition), and its
+    sessions share that same config (see CSVProc.session()), so a config can be shared between threads
+    freely. Use dataclasses.replace() to derive a modified config & CSVProc.apply_config() to switch to it.
+    """
+
+    # condition reports & start bids (user-configured in SettingsWindow)
+    using_bp_condition: bool = False
+    bp_condition: str = ""  # text to substitute for every lot's "Condition" field if using_bp_condition == True
+    calc_startbids: bool = False
+    calc_empty_startbids: bool = False
+
+    # checks & text fixes
+    check_title_quantities: bool = True
+    decimal_separator: str = "."    # in amounts like LoEst ("," for 1.200,50; see NumberParser)
+    repair_text: bool = True    # replace smart quotes, dashes, etc. in text fields (see TextRepair)
+    text_substitutions: dict = dataclasses.field(default_factory=dict)  # extra/overriding {char: replacement}
+    check_near_duplicates: bool = False     # compare lot texts (see DuplicateDetector); adds seconds per 10k lots
+    near_duplicate_threshold: float = 0.8   # estimated similarity (0-1) at which lots are flagged
+    unique_keys: tuple = (("Consign#", "Ref#"),)   # column groups no two lots may share (see ConstraintChecker)
+    key_dependencies: tuple = ()    # (columns, columns) pairs: lots agreeing on the first must agree on the second
+    check_estimate_outliers: bool = True
+    outlier_z_threshold: float = 3.5    # robust z-score above which estimates are unusual for the catalog
+    duplicate_index_path: str = ""  # SQLite index of past auctions' lot signatures ("" = this catalog only)
+    lot_history_path: str = ""      # SQLite database of past catalogs' lots, to check re-offered lots ("" = none)
+    auction_id: str = ""    # identifies this auction in the lot history ("" = the catalog's file name)
+    truncation_profile_path: str = ""   # JSON of learned column widths kept between catalogs ("" = none)
+    spelling_word_list_path: str = ""   # word list (one per line) for spell checking ("" = no spell check)
+    spelling_glossary_path: str = ""    # shop-specific words & names accepted as correctly spelled
+    image_dir: str = ""     # folder of exported preview images ("" = images aren't checked)
+    image_pattern: str = DEFAULT_IMAGE_PATTERN  # image file name (no extension) from {lot}, {ext} & {n}
+    images_per_lot: int = 1
+    image_workers: int = None   # threads used to check images (None = ThreadPoolExecutor's default)
+
+    # output
+    write_warning_records: bool = True  # also write warnings as JSON Lines alongside the text log
+    warning_db_path: str = ""   # SQLite database that collects warning records across runs ("" = none)
+    write_catalog_summary: bool = True  # totals, reserve coverage & warnings per consignor (see ConsignorReport)
+    write_consignor_lot_lists: bool = True  # a lot list file per consignor
+    export_max_rows: int = 0    # split exports into part files of at most this many lots (0 = no limit)
+    export_max_bytes: int = 0   # split exports into part files of at most this many bytes (0 = no limit)
+    delta_export: bool = False  # export only lots added/changed since the last export (plus a removed list)
+    snapshot_dir: str = ""      # where delta export snapshots are kept ("" = the output folder)
+    renumber_merged_lots: bool = False  # number the lots of merged files consecutively (see CSVProc.merge_paths)
+    quarantine_rows: bool = False   # divert rows that would abort an export to a reject file instead
+    zip_outputs: bool = False   # write every output file of a run into one .zip archive (see ZipOutputManifest)
+
+    # performance
+    parse_workers: int = None   # worker processes used to parse large catalogs (None = one per CPU)
+    use_disk_store: bool = False    # stage catalog rows in a temporary SQLite database instead of memory
+    store_batch_size: int = 5000    # rows per batch when processing from the disk store
+    store_directory: str = None     # where the temporary database is created (None = system temp dir)
+
+    def __post_init__(self):
+        # (a frozen dataclass can still hold a mutable dict; store a read-only view of a copy instead)
+        object.__setattr__(self, "text_substitutions", MappingProxyType(dict(self.text_substitutions)))
+
+
+    @classmethod
+    def option_names(cls) -> list:
+        return [field.name for field in dataclasses.fields(cls)]
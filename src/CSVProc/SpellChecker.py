@@ -0,0 +1,158 @@
+# SpellChecker.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import re
+
+
+# runs of letters not touching digits (so "19th", "1950s" & "6x8in" aren't checked)
+TOKEN_RE = re.compile(r"\b[^\W\d_]+\b")
+
+
+class SpellChecker:
+    """Dictionary-backed spelling checker with SymSpell-style suggestions.
+
+    Known words are held in a frozenset. Suggestions come from a deletion index: every word is
+    stored under each string obtained by deleting one of its characters, so candidates are found by
+    looking up the token and its own single-character deletions (instead of comparing the token to
+    every word). This finds every word within one edit of the token, and most within two (ex:
+    transpositions & a substitution plus an insertion) while keeping the index small. Results are cached per distinct token, since
+    catalogs repeat the same vocabulary over and over.
+    """
+
+    def __init__(self, words, glossary=(), *, min_length: int = 3):
+        """
+        Args:
+            words: the word list (any case; earlier words are preferred as suggestions).
+            glossary: extra words accepted as correct (ex: maker names & trade vocabulary).
+            min_length: tokens shorter than this aren't checked (ex: abbreviations like "ca").
+        """
+        self._ranked = list(dict.fromkeys(w.strip().lower() for w in [*glossary, *words] if w.strip()))
+        self.words = frozenset(self._ranked)
+        self._ranks = {word: rank for (rank, word) in enumerate(self._ranked)}
+        self.min_length = min_length
+
+        self._deletes = None    # built on first use (see suggestions())
+        self._cache = {}        # lowercase token -> suggestions ([] if the token is known)
+
+
+    @classmethod
+    def from_files(cls, word_list_path: str, glossary_path: str = None, **kwargs) -> "SpellChecker":
+        """Creates a SpellChecker from plain text files with one word per line.
+
+        Raises:
+            OSError: If a file can't be read.
+        """
+        with open(word_list_path, "r", encoding="utf-8", errors="replace") as word_file:
+            words = word_file.read().split()
+
+        glossary = []
+        if glossary_path:
+            with open(glossary_path, "r", encoding="utf-8", errors="replace") as glossary_file:
+                glossary = [line.strip() for line in glossary_file if line.strip() and not line.startswith("#")]
+
+        # (glossary entries may be phrases like "Royal Doulton"; each word is accepted)
+        return cls(words, [word for entry in glossary for word in TOKEN_RE.findall(entry)], **kwargs)
+
+
+    @staticmethod
+    def _single_deletes(word: str) -> set:
+        return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+    def _build_deletes(self):
+        deletes = {}
+        for (rank, word) in enumerate(self._ranked):
+            for deleted in self._single_deletes(word):
+                deletes.setdefault(deleted, []).append(rank)
+        self._deletes = deletes
+
+
+    def suggestions(self, token: str, limit: int = 3) -> list:
+        """Returns up to 'limit' known words close to 'token' (see class docstring), closest (then most common) first.
+        """
+        if self._deletes is None:
+            self._build_deletes()
+
+        token = token.lower()
+        candidates = set()
+        for key in {token} | self._single_deletes(token):
+            if key in self.words and key != token:
+                candidates.add(self._ranks[key])
+            candidates.update(self._deletes.get(key, ()))
+
+        scored = []
+        for rank in candidates:
+            word = self._ranked[rank]
+            distance = self.edit_distance(token, word, 2)
+            if distance <= 2:
+                scored.append((distance, rank, word))
+
+        return [word for (_, _, word) in sorted(scored)[:limit]]
+
+
+    def check_token(self, token: str) -> list:
+        """Returns [] if 'token' is spelled correctly (or isn't checked), else its suggestions (possibly none).
+
+        Misspelled tokens with no suggestion return [None], so the result is truthy.
+        """
+        lowered = token.lower()
+        result = self._cache.get(lowered)
+        if result is None:
+            if len(lowered) < self.min_length or lowered in self.words:
+                result = []
+            else:
+                result = self.suggestions(lowered) or [None]
+            self._cache[lowered] = result
+
+        return result
+
+
+    def check(self, text: str) -> list:
+        """Returns (token, suggestions) for each distinct misspelled token in 'text', in order of appearance.
+        """
+        misspelled = {}
+        for token in TOKEN_RE.findall(text):
+            if token not in misspelled:
+                suggestions = self.check_token(token)
+                if suggestions:
+                    misspelled[token] = [s for s in suggestions if s is not None]
+
+        return list(misspelled.items())
+
+
+    @staticmethod
+    def edit_distance(a: str, b: str, max_distance: int) -> int:
+        """Returns the optimal string alignment distance between 'a' & 'b' (insertions, deletions,
+        substitutions & adjacent transpositions), or max_distance + 1 once it's known to be larger.
+        """
+        if abs(len(a) - len(b)) > max_distance:
+            return max_distance + 1
+
+        previous2 = None
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = a[i - 1] != b[j - 1]
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                    current[j] = min(current[j], previous2[j - 2] + 1)
+            if min(current) > max_distance:
+                return max_distance + 1
+            (previous2, previous) = (previous, current)
+
+        return previous[-1]
@@ -0,0 +1,74 @@
+# TextRepair.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+# default replacements for characters that commonly end up in catalog text (mostly from Word pastes)
+DEFAULT_SUBSTITUTIONS = {
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'", "\u2032": "'",     # single quotes, prime
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"', "\u2033": '"',     # double quotes, double prime
+    "\u2013": "-", "\u2014": "-", "\u2012": "-", "\u2010": "-", "\u2011": "-", "\u2212": "-",     # dashes, minus
+    "\u00a0": " ", "\u2002": " ", "\u2003": " ", "\u2009": " ", "\u202f": " ",     # non-breaking & thin spaces
+    "\u200b": "", "\u00ad": "", "\ufeff": "",      # zero-width space, soft hyphen, byte order mark
+    "\u2026": "...", "\u2022": "-", "\u00b7": "-",     # ellipsis, bullets
+    "\u00bd": " 1/2", "\u00bc": " 1/4", "\u00be": " 3/4", "\u2153": " 1/3", "\u2154": " 2/3", "\u215b": " 1/8",
+    "\u00b0": " deg.", "\u00d7": "x", "\u00b4": "'", "`": "'",      # degree, multiplication sign, accents
+    "\u2122": "(TM)", "\u00ae": "(R)", "\u00a9": "(C)",
+    "\t": " ", "\n": " ", "\r": " ", "\v": " ", "\f": " ",
+}
+
+
+def build_translation_table(substitutions: dict = None) -> dict:
+    """Builds a str.translate() table from DEFAULT_SUBSTITUTIONS and 'substitutions' (which take precedence).
+
+    Catalog files are decoded as latin-1, but AuctionFlex runs on Windows and writes cp1252, so
+    characters like curly quotes arrive as C1 control characters (ex: \\x93 for a left double quote).
+    Those are mapped as if they had been decoded as cp1252. Any other control character is deleted.
+
+    Returns:
+        dict: {code point: replacement str (or None to delete)}
+    """
+    mapping = dict(DEFAULT_SUBSTITUTIONS)
+    mapping.update(substitutions or {})
+
+    table = {}
+
+    # remaining C0 control characters & DEL
+    for code_point in list(range(0x00, 0x20)) + [0x7f]:
+        table[code_point] = None
+
+    # C1 range: reinterpret as cp1252 (undefined cp1252 bytes are simply deleted)
+    for code_point in range(0x80, 0xa0):
+        try:
+            cp1252_char = bytes([code_point]).decode("cp1252")
+        except UnicodeDecodeError:
+            table[code_point] = None
+            continue
+        table[code_point] = mapping.get(cp1252_char, cp1252_char)
+
+    for (char, replacement) in mapping.items():
+        table[ord(char)] = replacement
+
+    return table
+
+
+def unmapped_characters(text: str) -> str:
+    """Returns the distinct non-ASCII or unprintable characters left in 'text' (in order of appearance).
+    """
+    if text.isascii() and text.isprintable():
+        return ""
+
+    return "".join(dict.fromkeys(c for c in text if not (c.isascii() and c.isprintable())))
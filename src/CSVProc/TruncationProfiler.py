@@ -0,0 +1,148 @@
+# TruncationProfiler.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+from collections import Counter
+
+
+# text ending in one of these wasn't cut off mid-sentence
+TERMINAL_PUNCTUATION = (".", ")", "!", "?", '"', "'")
+
+# export widths already known from AuctionFlex (used until a catalog or saved profile says otherwise)
+KNOWN_WIDTHS = {"Condition": 221}
+
+# description fields continue into the next one; a full field followed by more text isn't truncated
+CONTINUED_BY = {"Desc. 1": "Desc. 2", "Desc. 2": "Desc. 3", "Desc. 3": "Desc. 4", "Desc. 4": "Desc. 5"}
+
+
+class TruncationProfiler:
+    """Learns the width at which AuctionFlex cuts off each text column & finds the fields cut off at it.
+
+    AuctionFlex truncates fields at a fixed width during export, so a truncated column shows a
+    pile-up of values at exactly its maximum length. Rows are observed once, in a single pass: a
+    length histogram is kept per column, along with the lots whose value (not ending in terminal
+    punctuation) sits at the column's longest length seen so far. Once every row has been observed,
+    a column's width is its longest length if enough values share it (or its known/saved width), and
+    the lots kept at that width are the likely truncations. Memory use is independent of catalog size.
+    """
+
+    def __init__(self, fields: list, *, widths: dict = None, min_hits: int = 3):
+        """
+        Args:
+            fields: catalog columns to profile (ex: "Title", "Desc. 1", "Condition").
+            widths: {column: width} known in advance (ex: from a saved profile); KNOWN_WIDTHS by default.
+            min_hits: number of values that must share a column's longest length for it to be taken as
+                the column's export width.
+        """
+        self.fields = list(fields)
+        self.widths = dict(KNOWN_WIDTHS if widths is None else widths)
+        self.min_hits = min_hits
+
+        self.histograms = {field: Counter() for field in self.fields}
+        self._longest = {field: 0 for field in self.fields}
+        # field -> {length: [lots without terminal punctuation]} (only the known & longest lengths are kept)
+        self._candidates = {field: {} for field in self.fields}
+
+
+    @classmethod
+    def from_profile(cls, fields: list, path: str, **kwargs) -> "TruncationProfiler":
+        """Creates a profiler using the widths saved at 'path' (KNOWN_WIDTHS if it doesn't exist yet).
+        """
+        try:
+            with open(path, "r") as profile_file:
+                widths = {**KNOWN_WIDTHS, **json.load(profile_file)}
+        except (OSError, ValueError):
+            widths = None
+
+        return cls(fields, widths=widths, **kwargs)
+
+
+    def observe(self, lot: str, row: dict):
+        """Adds one catalog row (raw, as read from the file) to the profile.
+        """
+        for field in self.fields:
+            value = row.get(field) or ""
+            length = len(value)
+            self.histograms[field][length] += 1
+            if length == 0:
+                continue
+
+            known = self.widths.get(field)
+            longest = self._longest[field]
+            if length > longest:
+                # the previous longest length can't be the column width any more (unless it's known)
+                if longest != known:
+                    self._candidates[field].pop(longest, None)
+                self._longest[field] = longest = length
+
+            if length != longest and length != known:
+                continue
+            if value.rstrip().endswith(TERMINAL_PUNCTUATION):
+                continue
+            if field in CONTINUED_BY and row.get(CONTINUED_BY[field]):
+                continue
+
+            self._candidates[field].setdefault(length, []).append(lot)
+
+
+    def _is_ceiling(self, field: str, length: int) -> bool:
+        """Whether values pile up at 'length': at least min_hits of them, more than twice as many as at any
+        of the 10 lengths below it, but not most of the column (ex: titles that are all the same length).
+        """
+        histogram = self.histograms[field]
+        hits = histogram[length]
+        below = max(histogram[n] for n in range(max(1, length - 10), length)) if length > 1 else 0
+        non_empty = sum(histogram.values()) - histogram[0]
+
+        return hits >= self.min_hits and hits > 2 * below and hits <= non_empty / 2
+
+
+    def learned_widths(self) -> dict:
+        """Returns {column: width} for columns whose values pile up at their longest length.
+        """
+        return {field: self._longest[field] for field in self.fields
+                if self._longest[field] and self._is_ceiling(field, self._longest[field])}
+
+
+    def column_widths(self) -> dict:
+        """Returns the export width of each column: learned from this catalog if possible, else known/saved.
+        """
+        widths = {field: self.widths[field] for field in self.fields if field in self.widths}
+        widths.update(self.learned_widths())
+        return widths
+
+
+    def truncated(self) -> list:
+        """Returns (lot, column, width) for each value that likely was cut off, in file order per column.
+        """
+        return [(lot, field, width) for (field, width) in self.column_widths().items()
+                for lot in self._candidates[field].get(width, ())]
+
+
+    def save(self, path: str):
+        """Stores the column widths (merged with those already saved at 'path') for future catalogs.
+        """
+        try:
+            with open(path, "r") as profile_file:
+                saved = json.load(profile_file)
+        except (OSError, ValueError):
+            saved = {}
+
+        saved.update(self.column_widths())
+
+        with open(path, "w") as profile_file:
+            json.dump(saved, profile_file, indent=2)
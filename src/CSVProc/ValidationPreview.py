@@ -0,0 +1,153 @@
+# ValidationPreview.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import dataclasses
+import threading
+
+
+# columns whose values must parse as numbers
+NUMERIC_FIELDS = ("Qty", "LoEst", "HiEst", "StartBid", "Reserve")
+
+
+class _Cancelled(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class PreviewResult:
+    """Warnings a column mapping is estimated to produce for the whole catalog, from a sample of it.
+    """
+    sample_size: int
+    catalog_size: int
+    lots_by_field: dict     # column -> estimated number of lots with warnings about it
+    not_numeric: dict       # numeric column -> share (0-1) of sampled lots whose value doesn't parse
+    catalog_warnings: list  # warnings about the catalog as a whole (ex: missing columns)
+
+
+class ValidationPreview:
+    """Runs the validation checks (see CSVProc.run_validation()) on a sample of the catalog for a trial
+    column mapping, on a background thread, so the effect of a mapping is seen before processing.
+
+    The sample (the first rows plus rows picked at random from the rest) is read once; each update()
+    then only re-runs the checks on it, in small batches. Starting an update cancels the one in
+    progress: it stops at its next batch and never reports. Checks that read other files (lot
+    history, past catalogs' duplicates, images, spelling word list, truncation profile) are skipped.
+    """
+
+    def __init__(self, processor, *, first_rows: int = 50, random_rows: int = 200, batch_size: int = 25,
+                 seed=None):
+        """
+        Args:
+            processor: the CSVProc whose catalog (src_path) & configuration are previewed.
+            first_rows: rows sampled from the start of the catalog.
+            random_rows: rows sampled at random from the rest of it.
+        """
+        self.processor = processor
+        self.batch_size = batch_size
+        self.sample = processor.sample_rows(first_rows, random_rows, seed=seed)
+        self.catalog_size = len(processor._get_catalog_index())
+
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+
+    def _session(self, headers: list):
+        session = self.processor.session()
+        session.apply_config(dataclasses.replace(session.config(), lot_history_path="", duplicate_index_path="",
+                                                 image_dir="", spelling_word_list_path="",
+                                                 truncation_profile_path=""))
+        session.file_headers = list(headers)
+        session.file_num_cols = len(headers)
+
+        return session
+
+
+    def evaluate(self, headers: list, cancelled: threading.Event = None) -> PreviewResult:
+        """Checks the sample with 'headers' as the column mapping ("" for columns not assigned yet).
+
+        Raises:
+            ValueError: If the mapping lacks a column the checks can't do without (ex: LotNum, or one of
+                the "Desc. N" columns).
+        """
+        cancelled = cancelled or threading.Event()
+        records = [{header: value for (header, value) in zip(headers, row + [""] * (len(headers) - len(row)))
+                    if header} for row in self.sample]
+
+        def batches():
+            for start in range(0, len(records), self.batch_size):
+                if cancelled.is_set():
+                    raise _Cancelled()
+                yield (min(start + self.batch_size, len(records)), len(records),
+                       records[start:start + self.batch_size])
+
+        session = self._session(headers)
+        try:
+            session.run_validation(batches=batches())
+        except KeyError as e:
+            raise ValueError(f"Assign the {e.args[0]} column to preview warnings.") from None
+
+        lots_by_field = {}
+        for field in dict.fromkeys(record["field"] for record in session.warning_records if record["lot"] != "0"):
+            lots = {record["lot"] for record in session.warning_records
+                    if record["field"] == field and record["lot"] != "0"}
+            lots_by_field[field] = round(len(lots) * self.catalog_size / max(len(records), 1))
+
+        not_numeric = {}
+        for field in NUMERIC_FIELDS:
+            if field not in headers or not records:
+                continue
+            failures = 0
+            for record in records:
+                try:
+                    float(record[field])
+                except (TypeError, ValueError):
+                    failures += 1
+            not_numeric[field] = failures / len(records)
+
+        return PreviewResult(len(records), self.catalog_size, lots_by_field, not_numeric,
+                             session.lot_warnings.get("0", []))
+
+
+    def update(self, headers: list, callback):
+        """Cancels the evaluation in progress (if any) and starts evaluating 'headers' on a background thread.
+
+        Args:
+            callback: called (on the background thread) with a PreviewResult, or with the ValueError
+                raised for an unusable mapping; not called if the evaluation is cancelled.
+        """
+        with self._lock:
+            self._cancelled.set()
+            cancelled = self._cancelled = threading.Event()
+
+        def run():
+            try:
+                result = self.evaluate(headers, cancelled)
+            except _Cancelled:
+                return
+            except ValueError as e:
+                result = e
+
+            with self._lock:    # (so a result is never reported once a newer update() has returned)
+                if not cancelled.is_set():
+                    callback(result)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
@@ -0,0 +1,97 @@
+# WarningStore.py
+# af-csv-proc - Post-processor for exported auction catalogs
+# Copyright (C) 2021  Logan Foster
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import datetime
+import json
+import sqlite3
+import uuid
+
+
+# column order of a warning record (JSON Lines keys & SQLite columns)
+RECORD_FIELDS = ("run_id", "catalog", "timestamp", "lot", "consignor", "code", "field", "message")
+
+
+class WarningStore:
+    """Writes lot warnings as machine-readable records (JSON Lines and/or a SQLite database).
+
+    Each record carries the run & catalog it came from so that records from many auctions can be
+    collected in one place and queried (ex: warning codes per consignor across every past auction).
+    """
+
+    def __init__(self, catalog: str, run_id: str = None):
+        self.catalog = catalog
+        self.run_id = run_id or uuid.uuid4().hex
+        self.timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+
+
+    def records(self, warnings: list, consignors: dict = None):
+        """Yields complete records for 'warnings' (dicts with lot, code, field & message keys).
+
+        Args:
+            warnings: warning dicts, as collected in CSVProc.warning_records.
+            consignors: optional {lot: consignor number} used to fill in each record's consignor.
+        """
+        consignors = consignors or {}
+        for warning in warnings:
+            yield {"run_id": self.run_id, "catalog": self.catalog, "timestamp": self.timestamp,
+                   "lot": warning["lot"], "consignor": consignors.get(warning["lot"], ""),
+                   "code": warning["code"], "field": warning["field"], "message": warning["message"]}
+
+
+    def write_jsonl(self, jsonl_file, warnings: list, consignors: dict = None):
+        """Writes one JSON object per line to 'jsonl_file' (a writable text file), streaming records
+        rather than building the whole file.
+        """
+        for record in self.records(warnings, consignors):
+            jsonl_file.write(json.dumps(record) + "\n")
+
+
+    def write_sqlite(self, db_path: str, warnings: list, consignors: dict = None):
+        """Appends records to the 'warnings' table of the SQLite database at 'db_path' (created if needed).
+
+        Records from a previous run on the same catalog are kept; each run is distinguished by run_id.
+        """
+        with sqlite3.connect(db_path) as db:
+            self._create_schema(db)
+            db.executemany(f"INSERT INTO warnings ({', '.join(RECORD_FIELDS)}) "
+                           f"VALUES ({', '.join('?' * len(RECORD_FIELDS))})",
+                           (tuple(record[f] for f in RECORD_FIELDS) for record in self.records(warnings, consignors)))
+        db.close()
+
+
+    @staticmethod
+    def _create_schema(db: sqlite3.Connection):
+        db.execute("CREATE TABLE IF NOT EXISTS warnings (run_id TEXT, catalog TEXT, timestamp TEXT, lot TEXT, "
+                   "consignor TEXT, code TEXT, field TEXT, message TEXT)")
+        db.execute("CREATE INDEX IF NOT EXISTS warnings_lot ON warnings (lot)")
+        db.execute("CREATE INDEX IF NOT EXISTS warnings_code ON warnings (code, consignor)")
+        db.execute("CREATE INDEX IF NOT EXISTS warnings_consignor ON warnings (consignor)")
+
+
+    @staticmethod
+    def count_by_consignor(db_path: str, code: str) -> list:
+        """Returns (consignor, warning count, catalog count) for warnings of 'code', most frequent first.
+
+        Ex: count_by_consignor(db, WARN.TRUNCATED) lists the consignors whose lots keep producing
+        truncated conditions.
+        """
+        with sqlite3.connect(db_path) as db:
+            rows = db.execute("SELECT consignor, COUNT(*), COUNT(DISTINCT catalog) FROM warnings WHERE code = ? "
+                              "GROUP BY consignor ORDER BY COUNT(*) DESC", (code,)).fetchall()
+        db.close()
+
+        return rows
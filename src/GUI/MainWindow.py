@@ -21,6 +21,7 @@ from tkinter import filedialog as fd
 import os.path
 from src.GUI.SettingsWindow import SettingsWindow
 from src.CSVProc.CSVProc import CSVProc
+from src.CSVProc.CatalogIndex import CATALOG_EXTENSIONS, is_catalog_file
 from src import C
 
 
@@ -78,6 +79,8 @@ class MainWindow:
         self.settings_btn = ttk.Button(self.step2_frame, text="Settings", state=["disabled"],
                                        command=self.open_settings)
         self.settings_btn.grid(column=1, row=0, sticky=E)
+        self.validate_btn = ttk.Button(self.step2_frame, text="Validate", state=["disabled"], command=self.validate)
+        self.validate_btn.grid(column=2, row=0)
         self.process_btn = ttk.Button(self.step2_frame, text="Process", state=["disabled"], command=self.get_dest_file)
         self.process_btn.grid(column=3, row=0, sticky=W)
 
@@ -96,44 +99,51 @@ class MainWindow:
 
         Opens a tk filedialog to enable file selection, makes sure the file is readable,
         controls enabling/disabling of 'Settings' & 'Process' buttons. Called when user
-        clicks 'Browse' button.
+        clicks 'Browse' button. Selecting several files (ex: the sessions of a multi-day sale)
+        merges them into one catalog; the first file's columns are used to label them all.
         """
         try:
-            self.src_path = fd.askopenfilename(title="Select .csv file", filetypes=[("csv", ".csv")])
+            paths = fd.askopenfilenames(title="Select .csv file(s)", filetypes=[("csv", CATALOG_EXTENSIONS)])
+            self.src_path = paths[0] if paths else ""
             path, f = os.path.split(self.src_path)
-            _, ext = os.path.splitext(self.src_path)
+            ext = next((os.path.splitext(p)[1] or os.path.basename(p) for p in paths if not is_catalog_file(p)), "")
 
-            # handle file not chosen or wrong filetype chosen
+            # handle file not chosen or wrong filetype chosen (compressed .csv files are fine too)
             if not self.src_path:
                 raise RuntimeError
-            elif ext != ".csv":
+            elif ext:
                 raise TypeError
 
-            # make sure we can open the selected file
-            if not CSVProc.test_open(self.src_path):
+            # make sure we can open the selected file(s)
+            if not all(CSVProc.test_open(p) for p in paths):
                 self._set_entry_box_message("Unable to open selected file :(", is_error_msg=True)
                 self.process_btn.state(["disabled"])
+                self.validate_btn.state(["disabled"])
                 self.settings_btn.state(["disabled"])
             else:
                 # print filename in Entry field next to 'Save' button
-                self._set_entry_box_message(f)
+                self._set_entry_box_message(f if len(paths) == 1 else f"{f} (+{len(paths) - 1} more)")
                 self.settings_btn.state(["!disabled"])
                 # get the processor ready to process
                 self.processor.src_path = self.src_path
+                self.processor.merge_paths = list(paths[1:])
         except RuntimeError:
             self._set_entry_box_message("No file selected")
             self.settings_btn.state(["disabled"])
             self.process_btn.state(["disabled"])
+            self.validate_btn.state(["disabled"])
             self.set_progress(0)
         except TypeError:
             self._set_entry_box_message(f"Invalid filetype: {ext}", is_error_msg=True)
             self.settings_btn.state(["disabled"])
             self.process_btn.state(["disabled"])
+            self.validate_btn.state(["disabled"])
             self.set_progress(0)
         except:
             self._set_entry_box_message("Unknown error =/", is_error_msg=True)
             self.settings_btn.state(["disabled"])
             self.process_btn.state(["disabled"])
+            self.validate_btn.state(["disabled"])
             self.set_progress(0)
 
 
@@ -155,6 +165,36 @@ class MainWindow:
         self.processor.dest_path = dest_path
         self.processor.process(progress_callback=self.set_progress, result_callback=self._display_info_message)
 
+        # a delta only becomes the baseline of the next one once the user says it's been used
+        if self.processor.delta_export and messagebox.askyesno(
+                message="Use this delta export as the baseline for the next one?\n\n"
+                        "Answer yes once the delta files have been uploaded; until then, processing again "
+                        "produces the same delta."):
+            self.processor.accept_export_baselines()
+
+
+    def validate(self) -> None:
+        """'Validate' button click handler.
+
+        Checks the catalog without writing any files & summarizes the warnings found in a popup.
+        """
+        try:
+            warnings = self.processor.validate()
+        except (RuntimeError, ValueError) as e:
+            messagebox.showerror(message=f"Validation error: {e}")
+            return
+
+        num_warnings = sum(len(w) for w in warnings.values())
+        if num_warnings == 0:
+            self._display_info_message("No issues found; catalog is ready to process.")
+            return
+
+        # list the first few warnings (the full list is in the log file written by 'Process')
+        lines = [f"Lot {lot}: {w}" for (lot, lot_warnings) in warnings.items() for w in lot_warnings][:10]
+        if num_warnings > len(lines):
+            lines.append(f"... and {num_warnings - len(lines)} more")
+        self._display_info_message(f"{num_warnings} warnings found:\n\n" + "\n".join(lines))
+
 
     def open_settings(self):
         SettingsWindow(self.window, self.processor, self.src_path, save_success_callback=self.enable_proc_button)
@@ -162,6 +202,7 @@ class MainWindow:
 
     def enable_proc_button(self):
         self.process_btn.state(["!disabled"])
+        self.validate_btn.state(["!disabled"])
 
 
     def set_progress(self, value, *, increment=False):
@@ -17,8 +17,11 @@
 
 from tkinter import *
 from tkinter import ttk, messagebox
+import dataclasses
 import json
+import queue
 from src.CSVProc.CSVProc import CSVProc
+from src.CSVProc.ValidationPreview import ValidationPreview
 from src import CONF, C
 
 
@@ -36,7 +39,7 @@ class SettingsWindow:
         self._setup_GUI()
 
         # get the set of available column headers from the processor
-        self.unused_headers = self.processor.af_headers
+        self.unused_headers = set(self.processor.af_headers)
         self.used_headers = set()
         self.processor.src_path = self.source_path
         self._populate_table()
@@ -49,6 +52,13 @@ class SettingsWindow:
         # configuration settings from config.json file.
         self._load_settings()
 
+        # estimate the warnings of the column mapping as it changes (see _update_preview())
+        self.preview = ValidationPreview(self.processor)
+        self.preview_results = queue.Queue()    # (filled from the preview's background thread)
+        self.window.bind("<Destroy>", self._stop_preview)
+        self._update_preview()
+        self._show_preview_results()
+
         self.window.mainloop()
 
 
@@ -89,6 +99,9 @@ class SettingsWindow:
         self.table_scrollbar = ttk.Scrollbar(self.table_frame, orient=HORIZONTAL, command=self.table.xview)
         self.table_scrollbar.grid(row=2, column=0, sticky=(N, W, E))
         self.table.configure(xscrollcommand=self.table_scrollbar.set)
+        self.preview_var = StringVar()
+        self.preview_lbl = ttk.Label(self.table_frame, textvariable=self.preview_var, justify=LEFT)
+        self.preview_lbl.grid(row=3, column=0, sticky=(N, W))
 
         self.settings_frame = ttk.Frame(self.main_frame)
         self.settings_frame.grid(row=1, column=0, sticky=(N, W, E, S))
@@ -271,6 +284,49 @@ class SettingsWindow:
 
         popup.destroy()
         self.heading_popup_is_open = False   # allow new popups to spawn
+        self._update_preview()
+
+
+    def _update_preview(self):
+        """Starts re-checking the catalog sample with the table's current headers (cancelling any check
+        still running for an earlier mapping).
+        """
+        headers = [h.strip() for h in self.get_table_headers()]
+        self.preview.update(headers, self.preview_results.put)
+
+
+    def _show_preview_results(self):
+        """Displays the latest preview result (if any), then checks again shortly.
+        """
+        result = None
+        while not self.preview_results.empty():
+            result = self.preview_results.get_nowait()
+
+        if isinstance(result, Exception):
+            self.preview_var.set(str(result))
+        elif result is not None:
+            lines = [f"Estimated from {result.sample_size} of {result.catalog_size} lots:"]
+            for field in dict.fromkeys(list(result.lots_by_field) + list(result.not_numeric)):
+                notes = []
+                if result.lots_by_field.get(field):
+                    notes.append(f"~{result.lots_by_field[field]} lots with warnings")
+                if result.not_numeric.get(field):
+                    notes.append(f"{result.not_numeric[field]:.0%} not numeric")
+                if notes:
+                    lines.append(f"    {field or 'Other'}: {', '.join(notes)}")
+            lines.extend(f"    {warning}" for warning in result.catalog_warnings)
+            if len(lines) == 1:
+                lines.append("    no warnings")
+            self.preview_var.set("\n".join(lines))
+
+        self.preview_after_id = self.window.after(50, self._show_preview_results)
+
+
+    def _stop_preview(self, event):
+        # (<Destroy> is also received for each of the window's widgets)
+        if event.widget is self.window:
+            self.preview.cancel()
+            self.window.after_cancel(self.preview_after_id)
 
 
     def _release_popup_lock(self, popup):
@@ -355,11 +411,12 @@ class SettingsWindow:
 
         using_bp_cond_bool = True if self.using_bp_cond_str.get() == "yes" else False
 
-        # set processor member vars to local values
-        self.processor.using_bp_condition = using_bp_cond_bool
-        self.processor.bp_condition = self.get_bp_condition_text()
-        self.processor.calc_startbids = self.calc_startbids
-        self.processor.calc_empty_startbids = self.calc_empty_startbids
+        # set processor options to local values
+        self.processor.apply_config(dataclasses.replace(self.processor.config(),
+                                                        using_bp_condition=using_bp_cond_bool,
+                                                        bp_condition=self.get_bp_condition_text(),
+                                                        calc_startbids=self.calc_startbids,
+                                                        calc_empty_startbids=self.calc_empty_startbids))
 
         # additionally, save reusable settings to config file (for next time)
         config_data = {CONF.USING_BP_COND: using_bp_cond_bool,
@@ -28,6 +28,36 @@ class CONF:
     CALC_EMPTY_STARTBIDS = "calculate_empty_startbids_only"
 
 
+# Warning codes (machine-readable counterpart to warning messages; see CSVProc._add_lot_warning)
+class WARN:
+    TRUNCATED = "truncated"
+    NOT_NUMERIC = "not_numeric"
+    NUMBER_FORMAT = "number_format"
+    MISSING_COLUMN = "missing_corequisite_column"
+    MISSING_UNIT = "missing_unit"
+    MISSING_REF = "missing_reference"
+    DUPLICATE_KEY = "duplicate_key"
+    KEY_CONFLICT = "key_conflict"
+    DOUBLE_SPACE = "double_space"
+    PUNCTUATION = "punctuation"
+    NON_ASCII = "non_ascii"
+    UNPRINTABLE = "unprintable"
+    TITLE_LENGTH = "title_length"
+    ESTIMATE_ORDER = "estimate_order"
+    ESTIMATE_OUTLIER = "estimate_outlier"
+    REOFFERED_ESTIMATE = "reoffered_estimate"
+    REOFFERED_TEXT = "reoffered_text"
+    LOW_VALUE = "low_value"
+    STARTBID_ABOVE_EST = "startbid_above_estimate"
+    LOT_NUMBER = "lot_number"
+    LOT_COLLISION = "lot_collision"
+    QTY_MISMATCH = "qty_mismatch"
+    NEAR_DUPLICATE = "near_duplicate"
+    MISSING_IMAGE = "missing_image"
+    INVALID_IMAGE = "invalid_image"
+    SPELLING = "spelling"
+
+
 def try_pass(func):
     def wrapper(*args):
         try: